@@ -0,0 +1,111 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+import json
+
+import numpy as np
+
+import frappe
+from frappe import _
+from frappe.utils import flt
+
+from resource_management.utils.cost_engine import estimate_cost_matrix
+from resource_management.utils.load_index import LoadIndex, get_active_assignments
+from resource_management.utils.matching import min_cost_assignment
+from resource_management.utils.metrics import instrument
+from resource_management.utils.roster import get_active_employees
+
+@frappe.whitelist()
+@instrument("whitelist")
+def solve_pending_allocations(allocations=None):
+    """
+    Propose employees for pending (Requested) allocations at minimum total cost
+    Nothing is saved, the CGO reviews the proposal and applies it request by request
+    """
+    if not frappe.user.has_role('CGO') and not frappe.user.has_role('System Manager'):
+        frappe.throw(_("Only CGO can run the allocation solver"), frappe.PermissionError)
+
+    if isinstance(allocations, str):
+        allocations = json.loads(allocations)
+
+    filters = {"status": "Requested", "docstatus": 0}
+    if allocations:
+        filters["name"] = ["in", allocations]
+
+    requests = frappe.get_all("Resource Allocation",
+        filters=filters,
+        fields=["name", "project", "project_name", "start_date", "end_date", "allocation_percentage"],
+        order_by="request_date asc, name asc"
+    )
+    if not requests:
+        return {"assignments": [], "unassigned": [], "total_cost": 0}
+
+    employees = get_active_employees()
+
+    window_start = min(request.start_date for request in requests)
+    window_end = max(request.end_date for request in requests)
+    employee_ids = [emp.name for emp in employees]
+    load_index = LoadIndex(employee_ids, window_start, window_end,
+        get_active_assignments(window_start, window_end, employees=employee_ids))
+
+    costs = estimate_cost_matrix(employees, requests)
+    matched = match_requests(requests, employees, costs, load_index)
+
+    assignments = [
+        {
+            "allocation": requests[row].name,
+            "project": requests[row].project,
+            "project_name": requests[row].project_name,
+            "employee": employees[column].name,
+            "employee_name": employees[column].employee_name,
+            "department": employees[column].department,
+            "estimated_cost": flt(costs[row, column], 2)
+        }
+        for row, column in sorted(matched.items())
+    ]
+
+    return {
+        "assignments": assignments,
+        "unassigned": [request.name for row, request in enumerate(requests) if row not in matched],
+        "total_cost": flt(sum(a["estimated_cost"] for a in assignments), 2)
+    }
+
+def match_requests(requests, employees, costs, load_index):
+    """
+    Assign requests to employees in rounds of min-cost matching
+    Each round gives an employee at most one request among those whose capacity
+    still fits, the load index is updated before the next round so an employee
+    with spare capacity can take another request. Returns {request row: employee column}.
+    """
+    matched = {}
+    remaining = list(range(len(requests)))
+
+    while remaining:
+        percentages = np.array([flt(requests[row].allocation_percentage) for row in remaining])
+        peak = np.array([
+            load_index.peak_load(requests[row].start_date, requests[row].end_date)
+            for row in remaining
+        ])
+        feasible = peak + percentages[:, None] <= 100
+
+        round_cost = np.where(feasible, costs[remaining], np.inf)
+        columns = min_cost_assignment(round_cost)
+
+        newly_matched = [(row, int(column)) for row, column in zip(remaining, columns) if column >= 0]
+        if not newly_matched:
+            break
+
+        matched.update(newly_matched)
+        load_index.add([
+            {
+                "employee": employees[column].name,
+                "start_date": requests[row].start_date,
+                "end_date": requests[row].end_date,
+                "allocation_percentage": requests[row].allocation_percentage
+            }
+            for row, column in newly_matched
+        ])
+
+        remaining = [row for row in remaining if row not in matched]
+
+    return matched
@@ -0,0 +1,205 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+import csv
+import hashlib
+import json
+from itertools import islice
+
+import frappe
+from frappe import _
+from frappe.utils import now_datetime
+
+from resource_management.resource_management.report.resource_allocation_status.resource_allocation_status import (
+    get_conditions,
+)
+from resource_management.utils.archiver import get_table_source
+from resource_management.utils.metrics import instrument
+
+EXPORT_FORMATS = ("CSV", "Parquet")
+
+# Rows pulled from the server-side cursor and written per chunk
+EXPORT_CHUNK_SIZE = 10000
+
+EXPORT_COLUMNS = [
+    "assignment_id", "employee", "employee_name", "department", "project",
+    "project_name", "start_date", "end_date", "allocation_percentage",
+    "status", "estimated_cost"
+]
+
+@frappe.whitelist()
+@instrument("whitelist")
+def export_assignment_history(file_format="CSV", filters=None):
+    """Queue a streaming export of Project Assignment history"""
+    if not frappe.has_permission("Project Assignment", "export"):
+        frappe.throw(_("You don't have permission to export Project Assignments"), frappe.PermissionError)
+
+    if file_format not in EXPORT_FORMATS:
+        frappe.throw(_("Unsupported export format {0}").format(file_format))
+
+    if file_format == "Parquet":
+        get_parquet_modules()
+
+    if isinstance(filters, str):
+        filters = json.loads(filters)
+
+    frappe.enqueue(
+        "resource_management.api.assignment_export.build_assignment_export",
+        queue="long",
+        timeout=4 * 60 * 60,
+        file_format=file_format,
+        filters=filters or {},
+        user=frappe.session.user
+    )
+
+    return {"status": "queued", "message": _("Export started, you will be notified when the file is ready")}
+
+@instrument("job")
+def build_assignment_export(file_format, filters, user):
+    """Stream assignment rows into a private File without holding them in memory"""
+    filters = frappe._dict(filters)
+    file_name = "assignment_history_{0}.{1}".format(
+        now_datetime().strftime("%Y%m%d_%H%M%S"), "csv" if file_format == "CSV" else "parquet")
+    file_path = frappe.get_site_path("private", "files", file_name)
+
+    try:
+        # The unbuffered cursor streams rows from the database, no other
+        # query can run on the connection until it is exhausted
+        with frappe.db.unbuffered_cursor():
+            rows = frappe.db.sql(get_export_query(filters), filters, as_iterator=True)
+            if file_format == "CSV":
+                row_count = write_csv(file_path, rows)
+            else:
+                row_count = write_parquet(file_path, rows)
+
+        file_doc = frappe.get_doc({
+            "doctype": "File",
+            "file_name": file_name,
+            "file_url": f"/private/files/{file_name}",
+            "is_private": 1,
+            "content_hash": get_file_hash(file_path)
+        })
+        file_doc.flags.ignore_permissions = True
+        file_doc.insert()
+
+        notify_export_ready(user, file_doc, row_count)
+        frappe.db.commit()
+
+    except Exception as e:
+        frappe.log_error(f"Assignment History Export Error: {str(e)}", "Resource Allocation Export")
+        raise
+
+def get_export_query(filters):
+    """Assignment history query, same joins and filters as the status report"""
+    return """
+        SELECT
+            pa.name as assignment_id,
+            pa.employee,
+            emp.employee_name,
+            emp.department,
+            pa.project,
+            proj.project_name,
+            pa.start_date,
+            pa.end_date,
+            pa.allocation_percentage,
+            pa.status,
+            pa.estimated_total_cost as estimated_cost
+        FROM
+            {assignments} pa
+        LEFT JOIN
+            `tabEmployee` emp ON pa.employee = emp.name
+        LEFT JOIN
+            `tabProject` proj ON pa.project = proj.name
+        WHERE
+            pa.docstatus = 1
+            {conditions}
+        ORDER BY
+            pa.name
+    """.format(conditions=get_conditions(filters),
+        assignments=get_table_source("Project Assignment", filters.get("include_archived")))
+
+def iter_chunks(rows, size=EXPORT_CHUNK_SIZE):
+    """Yield lists of at most size rows from an iterator"""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+def write_csv(file_path, rows):
+    """Write rows to a CSV file chunk by chunk"""
+    row_count = 0
+    with open(file_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_COLUMNS)
+        for chunk in iter_chunks(rows):
+            writer.writerows(chunk)
+            row_count += len(chunk)
+
+    return row_count
+
+def write_parquet(file_path, rows):
+    """Write rows to a Parquet file, one row group per chunk"""
+    pyarrow, parquet = get_parquet_modules()
+    schema = pyarrow.schema([
+        ("assignment_id", pyarrow.string()),
+        ("employee", pyarrow.string()),
+        ("employee_name", pyarrow.string()),
+        ("department", pyarrow.string()),
+        ("project", pyarrow.string()),
+        ("project_name", pyarrow.string()),
+        ("start_date", pyarrow.date32()),
+        ("end_date", pyarrow.date32()),
+        ("allocation_percentage", pyarrow.float64()),
+        ("status", pyarrow.string()),
+        ("estimated_cost", pyarrow.float64())
+    ])
+
+    row_count = 0
+    with parquet.ParquetWriter(file_path, schema) as writer:
+        for chunk in iter_chunks(rows):
+            columns = list(zip(*chunk))
+            writer.write_table(pyarrow.Table.from_arrays(
+                [pyarrow.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema
+            ))
+            row_count += len(chunk)
+
+    return row_count
+
+def get_parquet_modules():
+    """Import pyarrow lazily, it is only needed for Parquet exports"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        frappe.throw(_("Parquet export requires the pyarrow package to be installed"))
+
+    return pyarrow, pyarrow.parquet
+
+def get_file_hash(file_path):
+    """MD5 of the file read in blocks, matches the File doctype content hash"""
+    md5 = hashlib.md5()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            md5.update(block)
+
+    return md5.hexdigest()
+
+def notify_export_ready(user, file_doc, row_count):
+    """Let the requesting user know the export file is ready"""
+    frappe.get_doc({
+        "doctype": "Notification Log",
+        "subject": f"Assignment history export ready: {file_doc.file_name}",
+        "for_user": user,
+        "type": "Alert",
+        "document_type": "File",
+        "document_name": file_doc.name,
+        "email_content": f"""
+            Your Project Assignment history export is ready:
+
+            File: {file_doc.file_url}
+            Rows: {row_count}
+        """
+    }).insert(ignore_permissions=True)
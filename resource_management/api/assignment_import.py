@@ -0,0 +1,388 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+import csv
+import heapq
+import os
+import tempfile
+import zlib
+from itertools import chain, count, groupby
+
+import frappe
+from frappe import _
+from frappe.utils import cstr, flt, getdate, now, now_datetime, today
+
+from resource_management.api.assignment_export import get_file_hash, iter_chunks
+from resource_management.resource_management.doctype.resource_allocation_snapshot.resource_allocation_snapshot import (
+    mark_snapshots_stale,
+)
+from resource_management.utils.archiver import get_table_source
+from resource_management.utils.availability_events import queue_availability_change
+from resource_management.utils.cost_engine import estimate_window_costs
+from resource_management.utils.metrics import instrument
+from resource_management.utils.recosting import update_project_resource_costs
+from resource_management.utils.report_cache import bump_cache_version
+
+REQUIRED_COLUMNS = ("employee", "project", "start_date", "end_date", "allocation_percentage")
+
+# Rows are spread over this many bucket files by employee, one bucket is
+# validated in memory at a time so memory stays flat whatever the file size
+IMPORT_BUCKETS = 64
+
+# Valid rows inserted and committed together
+INSERT_CHUNK_SIZE = 5000
+
+# Project Assignment is a child table, imported rows are filed under their project
+INSERT_FIELDS = ["name", "creation", "modified", "owner", "modified_by", "docstatus",
+    "parent", "parenttype", "parentfield", "project", "project_name", "employee", "employee_name",
+    "start_date", "end_date", "allocation_percentage", "status", "hourly_cost_rate", "estimated_total_cost"]
+
+@frappe.whitelist()
+@instrument("whitelist")
+def import_assignment_history(file_url):
+    """Queue a streaming import of historical Project Assignments from an uploaded CSV"""
+    if not frappe.has_permission("Project Assignment", "import"):
+        frappe.throw(_("You don't have permission to import Project Assignments"), frappe.PermissionError)
+
+    file_name = frappe.db.get_value("File", {"file_url": file_url})
+    if not file_name:
+        frappe.throw(_("File {0} not found").format(file_url))
+
+    with open(frappe.get_doc("File", file_name).get_full_path(), newline="", encoding="utf-8-sig") as f:
+        header = next(csv.reader(f), [])
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing:
+        frappe.throw(_("The file is missing the columns {0}").format(", ".join(missing)))
+
+    frappe.enqueue(
+        "resource_management.api.assignment_import.build_assignment_import",
+        queue="long",
+        timeout=4 * 60 * 60,
+        file_name=file_name,
+        user=frappe.session.user
+    )
+
+    return {"status": "queued", "message": _("Import started, you will be notified when it is done")}
+
+@instrument("job")
+def build_assignment_import(file_name, user):
+    """
+    Import a CSV of historical assignments without holding it in memory
+    Rows are partitioned by employee into bucket files, then each bucket is sorted
+    by employee and start date, swept against the existing timeline and bulk
+    inserted. Rejected rows go to an error file with the reason of each.
+    """
+    source_path = frappe.get_doc("File", file_name).get_full_path()
+    error_file_name = "assignment_import_errors_{0}.csv".format(now_datetime().strftime("%Y%m%d_%H%M%S"))
+    error_path = frappe.get_site_path("private", "files", error_file_name)
+    counts = {"imported": 0, "rejected": 0}
+
+    try:
+        with tempfile.TemporaryDirectory() as bucket_dir, \
+                open(error_path, "w", newline="", encoding="utf-8") as error_file:
+            errors = csv.writer(error_file)
+            header = partition_rows(source_path, bucket_dir)
+            errors.writerow(header + ["error"])
+
+            for bucket in range(IMPORT_BUCKETS):
+                bucket_path = os.path.join(bucket_dir, f"{bucket}.csv")
+                if not os.path.exists(bucket_path):
+                    continue
+
+                with open(bucket_path, newline="", encoding="utf-8") as f:
+                    rows = list(csv.DictReader(f, fieldnames=header))
+                valid, rejected = validate_bucket(rows)
+
+                for chunk in iter_chunks(valid, INSERT_CHUNK_SIZE):
+                    insert_assignments(chunk)
+                    queue_availability_change({line.employee for line in chunk})
+                    mark_snapshots_stale(min(line.start_date for line in chunk), max(line.end_date for line in chunk))
+                    update_project_resource_costs({line.project for line in chunk if line.status == "Active"})
+                    frappe.db.commit()
+
+                errors.writerows([row[column] for column in header] + [error] for row, error in rejected)
+                counts["imported"] += len(valid)
+                counts["rejected"] += len(rejected)
+
+        error_file_doc = None
+        if counts["rejected"]:
+            error_file_doc = frappe.get_doc({
+                "doctype": "File",
+                "file_name": error_file_name,
+                "file_url": f"/private/files/{error_file_name}",
+                "is_private": 1,
+                "content_hash": get_file_hash(error_path)
+            })
+            error_file_doc.flags.ignore_permissions = True
+            error_file_doc.insert()
+        else:
+            os.remove(error_path)
+
+        if counts["imported"]:
+            bump_cache_version()
+
+        notify_import_done(user, counts, error_file_doc)
+        frappe.db.commit()
+
+    except Exception as e:
+        frappe.log_error(f"Assignment History Import Error: {str(e)}", "Resource Allocation Import")
+        raise
+
+    return counts
+
+def partition_rows(source_path, bucket_dir):
+    """Stream the source file into bucket files by employee, returns the header"""
+    writers, files = {}, []
+    try:
+        with open(source_path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(f)
+            header = [cstr(column).strip() for column in next(reader, [])]
+            employee_column = header.index("employee")
+
+            for row in reader:
+                if not any(row):
+                    continue
+                row = (row + [""] * len(header))[:len(header)]
+                bucket = zlib.crc32(row[employee_column].strip().encode()) % IMPORT_BUCKETS
+                if bucket not in writers:
+                    files.append(open(os.path.join(bucket_dir, f"{bucket}.csv"), "w", newline="", encoding="utf-8"))
+                    writers[bucket] = csv.writer(files[-1])
+                writers[bucket].writerow(row)
+    finally:
+        for bucket_file in files:
+            bucket_file.close()
+
+    return header
+
+def validate_bucket(rows):
+    """Split the rows of one bucket into (valid, [(row, error)]), with one query per lookup"""
+    rejected = []
+    candidates = []
+    for row in rows:
+        line, error = parse_row(row)
+        if error:
+            rejected.append((row, error))
+        else:
+            candidates.append(line)
+
+    employees = {line.employee for line in candidates}
+    projects = {line.project for line in candidates}
+    employee_details = {
+        emp.name: emp for emp in frappe.get_all("Employee",
+            filters={"name": ["in", list(employees)]},
+            fields=["name", "employee_name", "hourly_cost_rate", "holiday_list", "company"]
+        )
+    } if employees else {}
+    project_names = dict(frappe.get_all("Project",
+        filters={"name": ["in", list(projects)]},
+        fields=["name", "project_name"],
+        as_list=True
+    )) if projects else {}
+
+    existing = get_existing_assignments(list(employee_details))
+
+    valid = []
+    candidates.sort(key=lambda line: (line.employee, line.start_date, line.end_date))
+    for employee, lines in groupby(candidates, key=lambda line: line.employee):
+        if employee not in employee_details:
+            rejected.extend((line.row, _("Employee {0} not found").format(employee)) for line in lines)
+            continue
+
+        timeline = Timeline(existing.get(employee, []))
+        for line in lines:
+            if line.project not in project_names:
+                error = _("Project {0} not found").format(line.project)
+            else:
+                error = timeline.check(line)
+
+            if error:
+                rejected.append((line.row, error))
+                continue
+
+            if line.status != "Cancelled":
+                timeline.add(line)
+            valid.append(line)
+
+    set_details(valid, employee_details, project_names)
+    return valid, rejected
+
+def parse_row(row):
+    """Normalized import line or an error message"""
+    for column in REQUIRED_COLUMNS:
+        if not cstr(row.get(column)).strip():
+            return None, _("{0} is required").format(column)
+
+    try:
+        start_date = getdate(row["start_date"].strip())
+        end_date = getdate(row["end_date"].strip())
+    except Exception:
+        return None, _("Invalid date")
+
+    if end_date < start_date:
+        return None, _("End Date cannot be before Start Date")
+
+    allocation_percentage = flt(row["allocation_percentage"])
+    if allocation_percentage <= 0 or allocation_percentage > 100:
+        return None, _("Allocation percentage must be between 0 and 100")
+
+    status = cstr(row.get("status")).strip() or ("Completed" if end_date < getdate(today()) else "Active")
+    if status not in ("Active", "Completed", "Cancelled"):
+        return None, _("Invalid status {0}").format(status)
+
+    return frappe._dict(
+        row=row,
+        employee=row["employee"].strip(),
+        project=row["project"].strip(),
+        start_date=start_date,
+        end_date=end_date,
+        allocation_percentage=allocation_percentage,
+        status=status,
+        hourly_cost_rate=flt(row.get("hourly_cost_rate")) or None,
+        estimated_total_cost=flt(row.get("estimated_total_cost")) or None
+    ), None
+
+def get_existing_assignments(employees):
+    """
+    Assignments already on record for the employees, grouped by employee and sorted by start
+    Archived assignments are included, imported history reaches back past the archive cutoff
+    """
+    if not employees:
+        return {}
+
+    assignments = frappe.db.sql("""
+        SELECT pa.name, pa.employee, pa.project, pa.start_date, pa.end_date, pa.allocation_percentage
+        FROM {assignments} pa
+        WHERE pa.employee IN %(employees)s
+            AND pa.status != 'Cancelled'
+            AND pa.docstatus < 2
+        ORDER BY pa.employee, pa.start_date
+    """.format(assignments=get_table_source("Project Assignment", include_archived=True)),
+        {"employees": tuple(employees)}, as_dict=1)
+
+    return {
+        employee: list(rows)
+        for employee, rows in groupby(assignments, key=lambda row: row.employee)
+    }
+
+class Timeline:
+    """
+    Assignments of one employee swept in start date order
+    Lines must be checked in start date order. An assignment joins the active set
+    when the sweep reaches its start and leaves it once it has ended, so each
+    check only looks at the assignments overlapping the line.
+    """
+
+    def __init__(self, assignments):
+        self.pending = sorted(assignments, key=lambda a: getdate(a.start_date))
+        self.position = 0
+        # Heap of (end_date, sequence, assignment) with the running load of its members
+        self.active = []
+        self.load = 0
+        self.sequence = count()
+
+    def advance(self, date):
+        """Move the sweep to date, taking in started assignments and dropping ended ones"""
+        while self.position < len(self.pending) and getdate(self.pending[self.position].start_date) <= date:
+            self.add(self.pending[self.position])
+            self.position += 1
+
+        while self.active and self.active[0][0] < date:
+            self.load -= flt(heapq.heappop(self.active)[2].allocation_percentage)
+
+    def add(self, line):
+        heapq.heappush(self.active, (getdate(line.end_date), next(self.sequence), line))
+        self.load += flt(line.allocation_percentage)
+
+    def check(self, line):
+        """Error message when the line overlaps its project or pushes the load above 100%"""
+        if line.status == "Cancelled":
+            return None
+
+        self.advance(line.start_date)
+
+        # Assignments starting inside the window are looked at, not taken in yet
+        upcoming = []
+        i = self.position
+        while i < len(self.pending) and getdate(self.pending[i].start_date) <= line.end_date:
+            upcoming.append(self.pending[i])
+            i += 1
+
+        for a in chain((entry[2] for entry in self.active), upcoming):
+            if a.project == line.project:
+                return _("Overlaps an assignment on the same project from {0} to {1}").format(
+                    getdate(a.start_date), getdate(a.end_date))
+
+        # Load only rises at a start date, so the peak inside the window is at the
+        # window start or at an upcoming start. Those are swept on a copy of the heap
+        load = peak = self.load
+        ending = list(self.active)
+        for a in upcoming:
+            start = getdate(a.start_date)
+            while ending and ending[0][0] < start:
+                load -= flt(heapq.heappop(ending)[2].allocation_percentage)
+            heapq.heappush(ending, (getdate(a.end_date), next(self.sequence), a))
+            load += flt(a.allocation_percentage)
+            peak = max(peak, load)
+
+        if peak + line.allocation_percentage > 100:
+            return _("Exceeds capacity, the employee is already allocated {0}% in this period").format(flt(peak, 2))
+
+        return None
+
+def set_details(lines, employee_details, project_names):
+    """Fill names, rates and estimated costs, pricing the lines without a cost in one pass"""
+    for line in lines:
+        employee = employee_details[line.employee]
+        line.employee_name = employee.employee_name
+        line.project_name = project_names.get(line.project)
+        line.hourly_cost_rate = line.hourly_cost_rate or flt(employee.hourly_cost_rate)
+
+    unpriced = [line for line in lines if line.estimated_total_cost is None]
+    costs = estimate_window_costs([
+        {
+            "employee": line.employee,
+            "start_date": line.start_date,
+            "end_date": line.end_date,
+            "allocation_percentage": line.allocation_percentage,
+            "hourly_cost_rate": line.hourly_cost_rate,
+            "holiday_list": employee_details[line.employee].holiday_list,
+            "company": employee_details[line.employee].company
+        }
+        for line in unpriced
+    ])
+    for line, cost in zip(unpriced, costs):
+        line.estimated_total_cost = flt(cost, 2)
+
+def insert_assignments(lines):
+    timestamp = now()
+    user = frappe.session.user
+    frappe.db.bulk_insert("Project Assignment", INSERT_FIELDS, [
+        (
+            frappe.generate_hash(length=10), timestamp, timestamp, user, user,
+            2 if line.status == "Cancelled" else 1,
+            line.project, "Project", "project_assignments",
+            line.project, line.project_name, line.employee, line.employee_name,
+            line.start_date, line.end_date, line.allocation_percentage, line.status,
+            line.hourly_cost_rate, line.estimated_total_cost
+        )
+        for line in lines
+    ])
+
+def notify_import_done(user, counts, error_file_doc=None):
+    """Let the importing user know the outcome"""
+    frappe.get_doc({
+        "doctype": "Notification Log",
+        "subject": "Assignment history import finished: {0} imported, {1} rejected".format(
+            counts["imported"], counts["rejected"]),
+        "for_user": user,
+        "type": "Alert",
+        "document_type": "File" if error_file_doc else None,
+        "document_name": error_file_doc.name if error_file_doc else None,
+        "email_content": f"""
+            Your Project Assignment history import is done:
+
+            Imported: {counts["imported"]}
+            Rejected: {counts["rejected"]}
+            Errors: {error_file_doc.file_url if error_file_doc else "none"}
+        """
+    }).insert(ignore_permissions=True)
@@ -0,0 +1,46 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+from frappe.utils import add_days, cint, getdate, today
+
+from resource_management.utils.load_index import LoadIndex, get_active_assignments, run_length_encode
+from resource_management.utils.metrics import instrument
+from resource_management.utils.roster import get_active_employees
+
+# A quarter of weekly buckets by default
+DEFAULT_WEEKS = 13
+MAX_WEEKS = 104
+
+@frappe.whitelist()
+@instrument("whitelist")
+def get_availability_heatmap(department=None, start_date=None, weeks=DEFAULT_WEEKS):
+    """
+    Free capacity per employee per week
+    Each row is run-length encoded as [free %, weeks, free %, weeks, ...], free
+    capacity is 100 minus the busiest day of the week and is negative when overbooked
+    """
+    if not frappe.has_permission("Project Assignment", "read"):
+        frappe.throw(_("You don't have permission to view employee availability"), frappe.PermissionError)
+
+    weeks = min(max(cint(weeks) or DEFAULT_WEEKS, 1), MAX_WEEKS)
+
+    # Buckets start on the Monday of the requested week
+    start = getdate(start_date or today())
+    start = add_days(start, -start.weekday())
+    end = add_days(start, weeks * 7 - 1)
+
+    employees = sorted(get_active_employees(department=department), key=lambda emp: emp.employee_name or "")
+    employee_ids = [emp.name for emp in employees]
+
+    load_index = LoadIndex(employee_ids, start, end,
+        get_active_assignments(start, end, employees=employee_ids))
+    free_capacity = (100 - load_index.bucket_peak_load(7)).round().astype(int)
+
+    return {
+        "start_date": start,
+        "weeks": [add_days(start, week * 7) for week in range(weeks)],
+        "employees": [[emp.name, emp.employee_name, emp.department] for emp in employees],
+        "rows": [run_length_encode(row.tolist()) for row in free_capacity]
+    }
@@ -0,0 +1,119 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+import json
+
+import frappe
+from frappe import _
+from frappe.utils import flt, getdate
+
+from resource_management.utils.cost_engine import estimate_window_costs
+from resource_management.utils.load_index import LoadIndex, get_active_assignments
+from resource_management.utils.metrics import instrument
+
+MAX_PLAN_LINES = 500
+
+@frappe.whitelist()
+@instrument("whitelist")
+def simulate_allocations(plan):
+    """
+    What-if check of hypothetical allocations against the current timeline
+    plan is a list of lines with employee, start_date, end_date, allocation_percentage
+    and optionally project. The lines are overlaid on an in-memory load index,
+    nothing is written to the database.
+    """
+    if not frappe.has_permission("Project Assignment", "read"):
+        frappe.throw(_("You don't have permission to view employee availability"), frappe.PermissionError)
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    lines = validate_plan(plan or [])
+    if not lines:
+        return {"lines": [], "employees": [], "total_cost": 0, "fits": True}
+
+    employees = frappe.get_all("Employee",
+        filters={"name": ["in", list({line.employee for line in lines})]},
+        fields=["name", "employee_name", "department", "hourly_cost_rate", "holiday_list", "company"]
+    )
+    employees = {emp.name: emp for emp in employees}
+    missing = [line.employee for line in lines if line.employee not in employees]
+    if missing:
+        frappe.throw(_("Employee {0} not found").format(missing[0]))
+
+    window_start = min(line.start_date for line in lines)
+    window_end = max(line.end_date for line in lines)
+    employee_ids = sorted(employees)
+    load_index = LoadIndex(employee_ids, window_start, window_end,
+        get_active_assignments(window_start, window_end, employees=employee_ids))
+
+    current_peak = dict(zip(employee_ids, load_index.peak_load()))
+    load_index.add(lines)
+    simulated_peak = dict(zip(employee_ids, load_index.peak_load()))
+
+    costs = estimate_window_costs([
+        dict(employees[line.employee], **line) for line in lines
+    ])
+
+    result_lines = []
+    for line, cost in zip(lines, costs):
+        peak = load_index.peak_load(line.start_date, line.end_date)[load_index.index[line.employee]]
+        result_lines.append({
+            "line": line.line,
+            "employee": line.employee,
+            "project": line.project,
+            "start_date": line.start_date,
+            "end_date": line.end_date,
+            "allocation_percentage": line.allocation_percentage,
+            "peak_load": flt(peak, 2),
+            "shortfall": flt(max(peak - 100, 0), 2),
+            "estimated_cost": flt(cost, 2)
+        })
+
+    result_employees = [
+        {
+            "employee": employee,
+            "employee_name": employees[employee].employee_name,
+            "department": employees[employee].department,
+            "current_peak_load": flt(current_peak[employee], 2),
+            "peak_load": flt(simulated_peak[employee], 2),
+            "shortfall": flt(max(simulated_peak[employee] - 100, 0), 2)
+        }
+        for employee in employee_ids
+    ]
+
+    return {
+        "lines": result_lines,
+        "employees": result_employees,
+        "total_cost": flt(sum(costs), 2),
+        "fits": not any(emp["shortfall"] for emp in result_employees)
+    }
+
+def validate_plan(plan):
+    """Normalize plan lines, throwing on the first invalid one"""
+    if len(plan) > MAX_PLAN_LINES:
+        frappe.throw(_("A plan can have at most {0} lines").format(MAX_PLAN_LINES))
+
+    lines = []
+    for i, row in enumerate(plan, start=1):
+        if not row.get("employee") or not row.get("start_date") or not row.get("end_date"):
+            frappe.throw(_("Line {0}: Employee, Start Date and End Date are required").format(i))
+
+        line = frappe._dict(
+            line=i,
+            employee=row.get("employee"),
+            project=row.get("project"),
+            start_date=getdate(row.get("start_date")),
+            end_date=getdate(row.get("end_date")),
+            allocation_percentage=flt(row.get("allocation_percentage"))
+        )
+
+        if line.end_date < line.start_date:
+            frappe.throw(_("Line {0}: End Date cannot be before Start Date").format(i))
+
+        if line.allocation_percentage <= 0 or line.allocation_percentage > 100:
+            frappe.throw(_("Line {0}: Allocation percentage must be between 0 and 100").format(i))
+
+        lines.append(line)
+
+    return lines
@@ -3,6 +3,18 @@
 
 import frappe
 from frappe import _
+from frappe.utils import now
+
+from resource_management.resource_management.doctype.resource_allocation_event.resource_allocation_event import log_event
+from resource_management.resource_management.doctype.resource_allocation_snapshot.resource_allocation_snapshot import (
+    mark_snapshots_stale,
+)
+from resource_management.scheduled_tasks.task_config import has_availability_field, update_availability
+from resource_management.utils.availability_events import queue_availability_change
+from resource_management.utils.metrics import instrument
+from resource_management.utils.recosting import update_project_resource_costs
+from resource_management.utils.report_cache import bump_cache_version
+from resource_management.utils.roster import get_user_full_name
 
 def get_permission_query_conditions(user):
     """
@@ -219,14 +231,74 @@ def on_cancel_resource_allocation(doc, method):
     if not (frappe.user.has_role('System Manager') or frappe.user.has_role('CGO')):
         frappe.throw(_("Only System Manager or CGO can cancel resource allocations"))
     
-    # Cancel related Project Assignment
-    project_assignments = frappe.get_all("Project Assignment", 
-        filters={"allocation_reference": doc.name})
+    # Cancel related Project Assignments, a bulk cancel has done it for the whole batch
+    if not doc.flags.skip_assignment_cascade:
+        cancel_project_assignments([doc.name])
+
+@frappe.whitelist()
+@instrument("whitelist")
+def cancel_project_allocations(project):
+    """Cancel every submitted allocation of a project together with its assignments"""
+    if not (frappe.user.has_role('System Manager') or frappe.user.has_role('CGO')):
+        frappe.throw(_("Only System Manager or CGO can cancel resource allocations"))
+    
+    allocations = frappe.get_all("Resource Allocation",
+        filters={"project": project, "docstatus": 1},
+        pluck="name"
+    )
+    if not allocations:
+        return {"allocations": 0, "assignments": 0}
+    
+    docs = [frappe.get_doc("Resource Allocation", name) for name in allocations]
+    for doc in docs:
+        doc.check_permission("cancel")
     
-    for pa in project_assignments:
-        pa_doc = frappe.get_doc("Project Assignment", pa.name)
-        if pa_doc.docstatus == 1:  # If submitted
-            pa_doc.cancel()
+    # Assignments go first in one batch, so no submitted assignment links
+    # to an allocation while it is cancelled
+    assignments = cancel_project_assignments(allocations)
+    
+    for doc in docs:
+        doc.flags.skip_assignment_cascade = True
+        doc.cancel()
+    
+    return {"allocations": len(allocations), "assignments": assignments}
+
+def cancel_project_assignments(allocations):
+    """
+    Cancel the active assignments of the given allocations in one statement
+    Completed assignments are history and stay as they are.
+    Rollups and caches are refreshed once for the whole batch, returns the number cancelled
+    """
+    assignments = frappe.get_all("Project Assignment",
+        filters={"allocation_reference": ["in", allocations], "status": "Active"},
+        fields=["name", "employee", "project", "allocation_reference", "start_date", "end_date"]
+    )
+    if not assignments:
+        return 0
+    
+    frappe.db.sql("""
+        UPDATE `tabProject Assignment`
+        SET status = 'Cancelled',
+            docstatus = IF(docstatus = 1, 2, docstatus),
+            modified = %(now)s,
+            modified_by = %(user)s
+        WHERE name IN %(assignments)s
+    """, {"assignments": tuple(a.name for a in assignments), "now": now(), "user": frappe.session.user})
+    
+    for assignment in assignments:
+        log_event("Cancelled", employee=assignment.employee, project=assignment.project,
+            resource_allocation=assignment.allocation_reference, project_assignment=assignment.name)
+    
+    # The per-document hooks did not run, refresh what they would have once
+    employees = {a.employee for a in assignments}
+    if has_availability_field():
+        update_availability([frappe._dict(name=employee) for employee in employees])
+    bump_cache_version()
+    queue_availability_change(employees)
+    mark_snapshots_stale(min(a.start_date for a in assignments), max(a.end_date for a in assignments))
+    update_project_resource_costs({a.project for a in assignments})
+    
+    return len(assignments)
 
 def create_project_assignment_on_submit(doc):
     """Create Project Assignment when Resource Allocation is submitted"""
@@ -306,7 +378,7 @@ def send_pending_approval_reminders():
                     
                     Request: {request.name}
                     Submitted: {request.creation}
-                    Requested by: {frappe.get_value('User', request.requested_by, 'full_name')}
+                    Requested by: {get_user_full_name(request.requested_by)}
                     
                     Please review and take action.
                 """
@@ -354,5 +426,6 @@ def generate_weekly_reports():
 
 def archive_old_allocations():
     """Archive old completed allocations (monthly task)"""
-    # Implementation for archiving old records
-    pass
\ No newline at end of file
+    from resource_management.utils.archiver import archive_old_allocations as run_archiver
+    
+    run_archiver()
\ No newline at end of file
@@ -0,0 +1,193 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+import json
+
+import numpy as np
+
+import frappe
+from frappe import _
+from frappe.utils import flt, getdate, today
+
+from resource_management.utils.cost_engine import estimate_cost_matrix
+from resource_management.utils.load_index import LoadIndex, get_active_assignments
+from resource_management.utils.metrics import instrument
+from resource_management.utils.roster import get_active_employees, get_user_full_name
+
+MAX_PLAN_LINES = 100
+
+# Candidates kept on each draft, best fit first
+SHORTLIST_SIZE = 20
+
+@frappe.whitelist()
+@instrument("whitelist")
+def create_staffing_plan(project, lines):
+    """
+    Create one draft Resource Allocation per staffing plan line
+    lines have start_date, end_date, allocation_percentage and optionally role
+    (the employee designation) and department. Shortlists for every line come
+    from one assignment fetch, the drafts are inserted in the request's
+    transaction and the CGOs get a single notification for the plan.
+    """
+    if not frappe.has_permission("Resource Allocation", "create"):
+        frappe.throw(_("You don't have permission to create resource allocations"), frappe.PermissionError)
+
+    if isinstance(lines, str):
+        lines = json.loads(lines)
+
+    project_name = frappe.db.get_value("Project", project, "project_name")
+    if not project_name:
+        frappe.throw(_("Project {0} not found").format(project))
+
+    lines = validate_staffing_plan(lines or [])
+    if not lines:
+        frappe.throw(_("A staffing plan needs at least one line"))
+
+    shortlists = get_shortlists(lines)
+
+    drafts = []
+    for line, shortlist in zip(lines, shortlists):
+        doc = frappe.get_doc({
+            "doctype": "Resource Allocation",
+            "project": project,
+            "start_date": line.start_date,
+            "end_date": line.end_date,
+            "allocation_percentage": line.allocation_percentage,
+            "status": "Draft",
+            "notes": line.notes,
+            "available_employees_table": shortlist
+        })
+        # Shortlist rows are already priced
+        doc.flags.skip_cost_estimate = True
+        doc.insert()
+        drafts.append({
+            "line": line.line,
+            "role": line.role,
+            "name": doc.name,
+            "candidates": len(shortlist)
+        })
+
+    send_staffing_plan_notification(project, project_name, drafts)
+
+    return {
+        "allocations": drafts,
+        "unstaffed": [draft["line"] for draft in drafts if not draft["candidates"]]
+    }
+
+def validate_staffing_plan(plan):
+    """Normalize plan lines, throwing on the first invalid one"""
+    if len(plan) > MAX_PLAN_LINES:
+        frappe.throw(_("A staffing plan can have at most {0} lines").format(MAX_PLAN_LINES))
+
+    lines = []
+    for i, row in enumerate(plan, start=1):
+        if not row.get("start_date") or not row.get("end_date"):
+            frappe.throw(_("Line {0}: Start Date and End Date are required").format(i))
+
+        line = frappe._dict(
+            line=i,
+            role=row.get("role"),
+            department=row.get("department"),
+            start_date=getdate(row.get("start_date")),
+            end_date=getdate(row.get("end_date")),
+            allocation_percentage=flt(row.get("allocation_percentage")),
+            notes=row.get("notes")
+        )
+
+        if line.end_date < line.start_date:
+            frappe.throw(_("Line {0}: End Date cannot be before Start Date").format(i))
+
+        if line.start_date < getdate(today()):
+            frappe.throw(_("Line {0}: Start Date cannot be in the past").format(i))
+
+        if line.allocation_percentage <= 0 or line.allocation_percentage > 100:
+            frappe.throw(_("Line {0}: Allocation percentage must be between 0 and 100").format(i))
+
+        lines.append(line)
+
+    return lines
+
+def get_shortlists(lines):
+    """
+    Available employees of every line as Resource Allocation Employee rows
+    One roster query and one assignment fetch over the plan's whole window
+    feed a load index, costs of every line and employee come from one matrix.
+    """
+    employees = get_active_employees()
+    if not employees:
+        return [[] for line in lines]
+
+    window_start = min(line.start_date for line in lines)
+    window_end = max(line.end_date for line in lines)
+    employee_ids = [emp.name for emp in employees]
+    load_index = LoadIndex(employee_ids, window_start, window_end,
+        get_active_assignments(window_start, window_end))
+
+    costs = estimate_cost_matrix(employees, lines)
+    designations = np.array([emp.designation or "" for emp in employees])
+    departments = np.array([emp.department or "" for emp in employees])
+
+    shortlists = []
+    for row, line in enumerate(lines):
+        current = load_index.peak_load(line.start_date, line.end_date)
+        fits = current + line.allocation_percentage <= 100
+        if line.role:
+            fits &= designations == line.role
+        if line.department:
+            fits &= departments == line.department
+
+        # Most spare capacity first, the cheaper employee on ties
+        candidates = np.flatnonzero(fits)
+        candidates = candidates[np.lexsort((costs[row, candidates], current[candidates]))][:SHORTLIST_SIZE]
+
+        shortlists.append([
+            {
+                "employee": employees[column].name,
+                "employee_name": employees[column].employee_name,
+                "department": employees[column].department,
+                "current_allocation": flt(current[column], 2),
+                "available_allocation": flt(100 - current[column], 2),
+                "hourly_cost_rate": employees[column].hourly_cost_rate or 0,
+                "estimated_cost": flt(costs[row, column], 2),
+                "is_available": 1
+            }
+            for column in candidates
+        ])
+
+    return shortlists
+
+def send_staffing_plan_notification(project, project_name, drafts):
+    """One notification per CGO for the whole plan"""
+    cgo_users = frappe.get_all("Has Role",
+        filters={"role": "CGO", "parenttype": "User"},
+        pluck="parent",
+        distinct=True
+    )
+    if not cgo_users:
+        return
+
+    requested_by = get_user_full_name(frappe.session.user)
+    allocations = "\n".join(
+        "{0}: {1} ({2} candidates)".format(draft["name"], draft["role"] or _("Any role"), draft["candidates"])
+        for draft in drafts
+    )
+
+    for user in cgo_users:
+        frappe.get_doc({
+            "doctype": "Notification Log",
+            "subject": f"New Staffing Plan: {project_name} ({len(drafts)} allocations)",
+            "for_user": user,
+            "type": "Alert",
+            "document_type": "Project",
+            "document_name": project,
+            "email_content": f"""
+                A staffing plan has been drafted:
+
+                Project: {project_name}
+                Requested By: {requested_by}
+                Allocations:
+                {allocations}
+
+                The allocations will be requested for approval one by one.
+            """
+        }).insert(ignore_permissions=True)
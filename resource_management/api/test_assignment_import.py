@@ -0,0 +1,91 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import getdate
+
+from resource_management.api.assignment_import import Timeline, parse_row
+
+
+def line(project, start_date, end_date, allocation_percentage, status="Active"):
+    return frappe._dict(
+        project=project,
+        start_date=getdate(start_date),
+        end_date=getdate(end_date),
+        allocation_percentage=allocation_percentage,
+        status=status,
+    )
+
+
+class TestTimeline(FrappeTestCase):
+    def setUp(self):
+        # Existing assignments, given out of order
+        self.timeline = Timeline([
+            line("P2", "2026-01-20", "2026-02-10", 30),
+            line("P1", "2026-01-01", "2026-01-31", 60),
+        ])
+
+    def test_line_within_capacity(self):
+        self.assertIsNone(self.timeline.check(line("P3", "2026-01-05", "2026-01-10", 40)))
+
+    def test_peak_at_a_later_start_is_found(self):
+        # 60% at the start of the window, 90% once P2 starts on the 20th
+        error = self.timeline.check(line("P3", "2026-01-05", "2026-01-25", 20))
+        self.assertIn("90", error)
+
+    def test_overlap_on_the_same_project(self):
+        error = self.timeline.check(line("P1", "2026-01-06", "2026-01-07", 5))
+        self.assertIn("same project", error)
+
+    def test_overlap_with_an_upcoming_assignment_on_the_same_project(self):
+        error = self.timeline.check(line("P2", "2026-01-15", "2026-01-20", 5))
+        self.assertIn("same project", error)
+
+    def test_ended_assignments_leave_the_sweep(self):
+        self.assertIsNone(self.timeline.check(line("P3", "2026-01-05", "2026-01-10", 40)))
+        # P1 ended on the 31st, only P2 is left
+        self.assertIsNone(self.timeline.check(line("P3", "2026-02-01", "2026-02-05", 70)))
+
+    def test_added_lines_count_towards_the_load(self):
+        self.assertIsNone(self.timeline.check(line("P4", "2026-02-01", "2026-02-03", 70)))
+        self.timeline.add(line("P4", "2026-02-01", "2026-02-03", 70))
+
+        error = self.timeline.check(line("P3", "2026-02-03", "2026-02-05", 5))
+        self.assertIn("100", error)
+        self.assertIsNone(self.timeline.check(line("P3", "2026-02-04", "2026-02-05", 5)))
+
+    def test_cancelled_lines_are_not_checked(self):
+        self.assertIsNone(self.timeline.check(line("P1", "2026-01-05", "2026-01-10", 100, "Cancelled")))
+
+
+class TestParseRow(FrappeTestCase):
+    def row(self, **values):
+        return dict({
+            "employee": " EMP-0001 ",
+            "project": "PROJ-0001",
+            "start_date": "2020-01-01",
+            "end_date": "2020-03-31",
+            "allocation_percentage": "50",
+        }, **values)
+
+    def test_valid_row(self):
+        parsed, error = parse_row(self.row())
+        self.assertIsNone(error)
+        self.assertEqual(parsed.employee, "EMP-0001")
+        self.assertEqual(parsed.start_date, getdate("2020-01-01"))
+        self.assertEqual(parsed.allocation_percentage, 50)
+        # Past rows without a status are history
+        self.assertEqual(parsed.status, "Completed")
+
+    def test_invalid_rows(self):
+        for values in (
+            {"employee": ""},
+            {"start_date": "not a date"},
+            {"end_date": "2019-12-31"},
+            {"allocation_percentage": "120"},
+            {"status": "Pending"},
+        ):
+            parsed, error = parse_row(self.row(**values))
+            self.assertIsNone(parsed)
+            self.assertTrue(error)
@@ -0,0 +1,198 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+"""
+Deterministic synthetic data for benchmarking on a local bench site
+
+    bench --site bench.local execute resource_management.benchmarks.data_generator.generate
+    bench --site bench.local execute resource_management.benchmarks.data_generator.clear
+
+The same seed and anchor date always produce the same rows. Dates are laid out
+relative to the anchor (today by default) so the active window always has data.
+Every generated record is named with the BENCH- prefix so it can be removed
+again with clear().
+"""
+
+import random
+from datetime import timedelta
+
+import frappe
+from frappe.utils import flt, getdate, now, today
+
+from resource_management.utils.roster import clear_roster_cache
+
+NAME_PREFIX = "BENCH-"
+CHUNK_SIZE = 10000
+DEPARTMENTS = 12
+PERCENTAGES = (10, 20, 25, 40, 50, 60, 75, 100)
+ALLOCATION_STATUSES = (("Approved", 0.6), ("Rejected", 0.15), ("Requested", 0.15), ("Draft", 0.1))
+
+# Average length plus gap of a generated assignment, and the share of each
+# employee's chain placed before the anchor date
+AVERAGE_ASSIGNMENT_DAYS = 36
+HISTORY_SHARE = 0.8
+
+def generate(seed=42, employees=10000, assignments=2000000, allocations=50000, projects=2000, anchor_date=None):
+    """Insert the benchmark dataset, clearing any previous one first"""
+    clear()
+
+    rng = random.Random(seed)
+    anchor = getdate(anchor_date or today())
+    company = frappe.defaults.get_global_default("company") or frappe.db.get_value("Company", {}, "name")
+    if not company:
+        frappe.throw("Create a Company before generating benchmark data")
+
+    departments = make_departments(company)
+    employee_ids = insert_employees(rng, int(employees), company, departments)
+    project_ids = insert_projects(int(projects), company)
+    insert_assignments(rng, employee_ids, project_ids, int(assignments), anchor)
+    insert_allocations(rng, employee_ids, project_ids, int(allocations), anchor)
+
+    frappe.db.commit()
+    clear_roster_cache()
+    print("Generated {0} employees, {1} projects, {2} assignments and {3} allocations (seed {4}, anchor {5})".format(
+        employees, projects, assignments, allocations, seed, anchor))
+
+def clear():
+    """Delete every generated record"""
+    name_filter = {"name": ["like", NAME_PREFIX + "%"]}
+    frappe.db.delete("Resource Allocation Employee", {"parent": ["like", NAME_PREFIX + "%"]})
+    for doctype in ("Resource Allocation", "Project Assignment", "Project", "Employee"):
+        frappe.db.delete(doctype, name_filter)
+    frappe.db.commit()
+    clear_roster_cache()
+
+def make_departments(company):
+    """A fixed set of departments, created through the ORM since they form a tree"""
+    departments = []
+    for i in range(1, DEPARTMENTS + 1):
+        department_name = "Bench Department {0:02d}".format(i)
+        name = frappe.db.get_value("Department", {"department_name": department_name, "company": company})
+        if not name:
+            name = frappe.get_doc({
+                "doctype": "Department",
+                "department_name": department_name,
+                "company": company
+            }).insert(ignore_permissions=True).name
+        departments.append(name)
+    return departments
+
+def insert_employees(rng, count, company, departments):
+    fields = ["name", "creation", "modified", "owner", "modified_by", "naming_series",
+        "first_name", "employee_name", "gender", "date_of_birth", "date_of_joining",
+        "status", "company", "department", "hourly_cost_rate"]
+    timestamp = now()
+
+    employee_ids = ["{0}EMP-{1:06d}".format(NAME_PREFIX, i) for i in range(1, count + 1)]
+    rows = (
+        (
+            employee, timestamp, timestamp, "Administrator", "Administrator", "HR-EMP-",
+            "Employee {0}".format(i), "Employee {0}".format(i),
+            rng.choice(("Male", "Female")),
+            getdate("1970-01-01") + timedelta(days=rng.randrange(0, 12000)),
+            getdate("2010-01-01") + timedelta(days=rng.randrange(0, 4000)),
+            "Active" if rng.random() > 0.05 else "Left",
+            company, departments[i % len(departments)],
+            flt(rng.uniform(15, 120), 2)
+        )
+        for i, employee in enumerate(employee_ids, start=1)
+    )
+    bulk_insert("Employee", fields, rows)
+    return employee_ids
+
+def insert_projects(count, company):
+    fields = ["name", "creation", "modified", "owner", "modified_by",
+        "project_name", "status", "is_active", "company"]
+    timestamp = now()
+
+    project_ids = ["{0}PRJ-{1:05d}".format(NAME_PREFIX, i) for i in range(1, count + 1)]
+    bulk_insert("Project", fields, (
+        (project, timestamp, timestamp, "Administrator", "Administrator",
+            "Bench Project {0}".format(i), "Open", "Yes", company)
+        for i, project in enumerate(project_ids, start=1)
+    ))
+    return project_ids
+
+def insert_assignments(rng, employee_ids, project_ids, count, anchor):
+    """
+    Each employee gets a chain of assignments, mostly before the anchor and
+    partly after it, occasional negative gaps make overlapping (and some overbooked) windows
+    """
+    fields = ["name", "creation", "modified", "owner", "modified_by", "docstatus",
+        "project", "project_name", "employee", "employee_name", "start_date", "end_date",
+        "allocation_percentage", "status", "hourly_cost_rate", "estimated_total_cost"]
+    timestamp = now()
+    per_employee = max(count // len(employee_ids), 1)
+    history_days = int(per_employee * AVERAGE_ASSIGNMENT_DAYS * HISTORY_SHARE)
+
+    def rows():
+        number = 0
+        for i, employee in enumerate(employee_ids, start=1):
+            rate = flt(rng.uniform(15, 120), 2)
+            start = anchor - timedelta(days=history_days + rng.randrange(0, 30))
+            for _ in range(per_employee):
+                if number >= count:
+                    return
+                number += 1
+                days = rng.randrange(5, 60)
+                end = start + timedelta(days=days)
+                pct = rng.choice(PERCENTAGES)
+                project = rng.choice(project_ids)
+                yield (
+                    "{0}PA-{1:07d}".format(NAME_PREFIX, number), timestamp, timestamp,
+                    "Administrator", "Administrator", 1,
+                    project, "Bench Project {0}".format(int(project.rsplit("-", 1)[1])),
+                    employee, "Employee {0}".format(i), start, end, pct,
+                    "Completed" if end < anchor else "Active",
+                    rate, flt(days * 5 / 7 * 8 * rate * pct / 100, 2)
+                )
+                start = end + timedelta(days=rng.randrange(-10, 20))
+
+    bulk_insert("Project Assignment", fields, rows())
+
+def insert_allocations(rng, employee_ids, project_ids, count, anchor):
+    """Allocations in every workflow state, each with its selected employee row"""
+    parent_fields = ["name", "creation", "modified", "owner", "modified_by", "docstatus",
+        "project", "project_name", "start_date", "end_date", "allocation_percentage",
+        "requested_by", "request_date", "status"]
+    child_fields = ["name", "creation", "modified", "owner", "modified_by", "docstatus",
+        "parent", "parenttype", "parentfield", "idx", "employee", "employee_name",
+        "hourly_cost_rate", "estimated_cost", "is_available", "select_employee"]
+    timestamp = now()
+    statuses = [status for status, _share in ALLOCATION_STATUSES]
+    weights = [share for _status, share in ALLOCATION_STATUSES]
+
+    parents, children = [], []
+    for number in range(1, count + 1):
+        name = "{0}RA-{1:06d}".format(NAME_PREFIX, number)
+        status = rng.choices(statuses, weights)[0]
+        start = anchor + timedelta(days=rng.randrange(-700, 300))
+        end = start + timedelta(days=rng.randrange(14, 180))
+        project = rng.choice(project_ids)
+        employee = rng.choice(employee_ids)
+        docstatus = 1 if status == "Approved" else 0
+
+        parents.append((name, timestamp, timestamp, "Administrator", "Administrator", docstatus,
+            project, "Bench Project {0}".format(int(project.rsplit("-", 1)[1])), start, end,
+            rng.choice(PERCENTAGES), "Administrator", start - timedelta(days=rng.randrange(1, 30)), status))
+        children.append(("{0}RAE-{1:06d}".format(NAME_PREFIX, number), timestamp, timestamp,
+            "Administrator", "Administrator", docstatus, name, "Resource Allocation",
+            "available_employees_table", 1, employee,
+            "Employee {0}".format(int(employee.rsplit("-", 1)[1])), 0, 0, 1, int(status != "Draft")))
+
+    bulk_insert("Resource Allocation", parent_fields, parents)
+    bulk_insert("Resource Allocation Employee", child_fields, children)
+
+def bulk_insert(doctype, fields, rows):
+    """Insert rows from any iterable in chunks, committing after each one"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_SIZE:
+            frappe.db.bulk_insert(doctype, fields, chunk)
+            frappe.db.commit()
+            chunk = []
+
+    if chunk:
+        frappe.db.bulk_insert(doctype, fields, chunk)
+        frappe.db.commit()
@@ -0,0 +1,286 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+"""
+Concurrent load test of the Draft -> Requested -> Approved flow
+
+    bench --site bench.local execute resource_management.benchmarks.data_generator.generate \
+        --kwargs "{'employees': 500, 'assignments': 20000, 'allocations': 0, 'projects': 50}"
+    bench --site bench.local execute resource_management.benchmarks.load_test.run \
+        --kwargs "{'base_url': 'http://bench.local:8000', 'requesters': 200, 'cgos': 4}"
+
+Simulated users talk to the running bench over HTTP. Requesters create drafts
+and request them and CGOs approve the queue concurrently. The run reports
+throughput, latency percentiles per call, deadlocks and lock timeouts, and the
+overbooked spans the approved allocations produced.
+"""
+
+import queue
+import random
+import threading
+import time
+from collections import defaultdict
+from itertools import groupby
+
+import requests
+
+import frappe
+from frappe.utils import add_days, getdate, today
+
+from resource_management.benchmarks.data_generator import NAME_PREFIX
+from resource_management.resource_management.doctype.resource_overallocation.resource_overallocation import (
+    find_overbooked_spans,
+)
+
+REQUESTER_EMAIL = "bench-requester-{0}@example.com"
+CGO_EMAIL = "bench-cgo-{0}@example.com"
+ALLOCATION_METHOD = "resource_management.resource_management.doctype.resource_allocation.resource_allocation.{0}"
+
+# Requesters pick among the first few candidates so they compete for the same people
+DEFAULT_HOT_EMPLOYEES = 5
+REQUEST_TIMEOUT = 120
+
+def run(base_url="http://localhost:8000", requesters=100, cgos=3, flows_per_requester=3,
+        hot_employees=DEFAULT_HOT_EMPLOYEES, seed=42):
+    """Drive the flow with simulated users and print the report"""
+    requesters, cgos = int(requesters), int(cgos)
+    projects = frappe.get_all("Project", filters={"name": ["like", NAME_PREFIX + "%"]}, pluck="name")
+    if not projects:
+        frappe.throw("Generate benchmark data before running the load test")
+
+    requester_keys = setup_users(REQUESTER_EMAIL, requesters, "Employee")
+    cgo_keys = setup_users(CGO_EMAIL, cgos, "CGO")
+    frappe.db.commit()
+
+    stats = LoadStats()
+    requested = queue.Queue()
+    requesters_done = threading.Event()
+
+    requester_threads = [
+        threading.Thread(target=requester_worker, args=(
+            base_url, keys, random.Random(int(seed) + i), projects, int(flows_per_requester),
+            int(hot_employees), requested, stats))
+        for i, keys in enumerate(requester_keys)
+    ]
+    cgo_threads = [
+        threading.Thread(target=cgo_worker, args=(base_url, keys, requested, requesters_done, stats))
+        for keys in cgo_keys
+    ]
+
+    started = time.perf_counter()
+    for thread in requester_threads + cgo_threads:
+        thread.start()
+    for thread in requester_threads:
+        thread.join()
+    requesters_done.set()
+    for thread in cgo_threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    stats.print_report(elapsed)
+    print_overbookings(stats.approved)
+    return stats.summary(elapsed)
+
+def setup_users(email_template, count, role):
+    """Create (or reuse) the simulated users and return their API credentials"""
+    keys = []
+    for i in range(1, count + 1):
+        email = email_template.format(i)
+        if frappe.db.exists("User", email):
+            user = frappe.get_doc("User", email)
+        else:
+            user = frappe.get_doc({
+                "doctype": "User",
+                "email": email,
+                "first_name": email.split("@")[0],
+                "send_welcome_email": 0,
+                "roles": [{"role": role}]
+            }).insert(ignore_permissions=True)
+
+        api_secret = frappe.generate_hash(length=15)
+        user.api_key = user.api_key or frappe.generate_hash(length=15)
+        user.api_secret = api_secret
+        user.save(ignore_permissions=True)
+        keys.append((user.api_key, api_secret))
+    return keys
+
+def clear():
+    """Delete the allocations and assignments created by load test runs"""
+    allocations = frappe.get_all("Resource Allocation",
+        filters={"requested_by": ["like", REQUESTER_EMAIL.format("%")]},
+        pluck="name"
+    )
+    if allocations:
+        frappe.db.delete("Project Assignment", {"allocation_reference": ["in", allocations]})
+        frappe.db.delete("Resource Allocation Employee", {"parent": ["in", allocations]})
+        frappe.db.delete("Resource Allocation", {"name": ["in", allocations]})
+    frappe.db.commit()
+
+def requester_worker(base_url, keys, rng, projects, flows, hot_employees, requested, stats):
+    session = make_session(keys)
+    for _ in range(flows):
+        start_date = add_days(today(), rng.randrange(0, 60))
+        values = {
+            "project": rng.choice(projects),
+            "start_date": start_date,
+            "end_date": add_days(start_date, rng.randrange(14, 90)),
+            "allocation_percentage": rng.choice((25, 50, 75, 100))
+        }
+
+        ok, result = call(session, stats, "get_available_employees", "POST",
+            f"{base_url}/api/method/{ALLOCATION_METHOD.format('get_available_employees')}", values)
+        if not ok or not result.get("available_employees"):
+            continue
+
+        candidates = result["available_employees"]
+        selected = rng.choice(candidates[:hot_employees])
+
+        ok, draft = call(session, stats, "create_draft", "POST",
+            f"{base_url}/api/resource/Resource Allocation",
+            dict(values, available_employees_table=[
+                {k: row.get(k) for k in ("employee", "employee_name", "department", "current_allocation",
+                    "available_allocation", "hourly_cost_rate", "estimated_cost")}
+                for row in candidates[:hot_employees]
+            ]))
+        if not ok:
+            continue
+
+        ok, _result = call(session, stats, "request_allocation", "POST",
+            f"{base_url}/api/method/{ALLOCATION_METHOD.format('request_allocation')}",
+            {"name": draft["name"], "selected_employee": selected["employee"]})
+        if ok:
+            requested.put(draft["name"])
+
+def cgo_worker(base_url, keys, requested, requesters_done, stats):
+    session = make_session(keys)
+    while True:
+        try:
+            name = requested.get(timeout=1)
+        except queue.Empty:
+            if requesters_done.is_set():
+                return
+            continue
+
+        ok, _result = call(session, stats, "approve_request", "POST",
+            f"{base_url}/api/method/{ALLOCATION_METHOD.format('approve_request')}", {"name": name})
+        if ok:
+            stats.add_approved(name)
+
+def make_session(keys):
+    session = requests.Session()
+    session.headers.update({
+        "Authorization": "token {0}:{1}".format(*keys),
+        "Accept": "application/json"
+    })
+    return session
+
+def call(session, stats, operation, method, url, payload):
+    """One timed HTTP call, returns (ok, message or data)"""
+    started = time.perf_counter()
+    try:
+        response = session.request(method, url, json=payload, timeout=REQUEST_TIMEOUT)
+        ok = response.ok
+        body = response.json() if response.content else {}
+        error = None if ok else response.text
+    except Exception as e:
+        ok, body, error = False, {}, str(e)
+
+    stats.add(operation, time.perf_counter() - started, error)
+    return ok, body.get("message", body.get("data")) if ok else None
+
+def classify_error(error):
+    text = error.lower()
+    if "deadlock" in text or "1213" in text:
+        return "deadlock"
+    if "lock wait timeout" in text or "1205" in text:
+        return "lock_timeout"
+    if "has been modified" in text or "timestampmismatch" in text:
+        return "conflict"
+    if "no longer available" in text:
+        return "unavailable"
+    return "other"
+
+class LoadStats:
+    """Thread-safe collection of call timings and outcomes"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.errors = defaultdict(lambda: defaultdict(int))
+        self.approved = []
+
+    def add(self, operation, seconds, error=None):
+        with self.lock:
+            self.timings[operation].append(seconds)
+            if error:
+                self.errors[operation][classify_error(error)] += 1
+
+    def add_approved(self, name):
+        with self.lock:
+            self.approved.append(name)
+
+    def summary(self, elapsed):
+        return {
+            "elapsed": round(elapsed, 2),
+            "approved": len(self.approved),
+            "throughput": round(len(self.approved) / elapsed, 2) if elapsed else 0,
+            "operations": {
+                operation: dict(
+                    calls=len(timings),
+                    p50=percentile(timings, 50),
+                    p95=percentile(timings, 95),
+                    p99=percentile(timings, 99),
+                    errors=dict(self.errors[operation])
+                )
+                for operation, timings in self.timings.items()
+            }
+        }
+
+    def print_report(self, elapsed):
+        summary = self.summary(elapsed)
+        print("Approved {0} allocations in {1}s ({2} per second)".format(
+            summary["approved"], summary["elapsed"], summary["throughput"]))
+        print("{0:<25} {1:>7} {2:>8} {3:>8} {4:>8}  errors".format("operation", "calls", "p50", "p95", "p99"))
+        for operation, values in summary["operations"].items():
+            print("{0:<25} {1:>7} {2:>8.3f} {3:>8.3f} {4:>8.3f}  {5}".format(
+                operation, values["calls"], values["p50"], values["p95"], values["p99"],
+                ", ".join("{0}={1}".format(kind, count) for kind, count in values["errors"].items()) or "-"))
+
+def percentile(values, pct):
+    if not values:
+        return 0
+    values = sorted(values)
+    return round(values[min(int(len(values) * pct / 100), len(values) - 1)], 4)
+
+def print_overbookings(approved):
+    """Overbooked spans that include at least one assignment approved during the run"""
+    if not approved:
+        return
+
+    frappe.db.rollback()
+    employees = frappe.get_all("Project Assignment",
+        filters={"allocation_reference": ["in", approved]},
+        pluck="employee",
+        distinct=True
+    )
+    if not employees:
+        print("No Project Assignments were created for the approved allocations")
+        return
+
+    assignments = frappe.get_all("Project Assignment",
+        filters={"employee": ["in", employees], "status": "Active", "docstatus": 1, "end_date": [">=", today()]},
+        fields=["name", "employee", "start_date", "end_date", "allocation_percentage", "allocation_reference"],
+        order_by="employee asc, start_date asc"
+    )
+
+    approved = set(approved)
+    overbooked = []
+    for employee, rows in groupby(assignments, key=lambda row: row.employee):
+        for span in find_overbooked_spans(employee, list(rows)):
+            if any(a.allocation_reference in approved for a in span["assignments"].values()):
+                overbooked.append(span)
+
+    print("Overbooked spans caused by the run: {0}".format(len(overbooked)))
+    for span in overbooked[:20]:
+        print("  {0} {1} .. {2} at {3}%".format(
+            span["employee"], getdate(span["from_date"]), getdate(span["to_date"]), span["peak"]))
@@ -0,0 +1,186 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+"""
+Query-count budgets for whitelisted endpoints and scheduled tasks
+
+    bench --site bench.local execute resource_management.benchmarks.query_budget.run
+
+Every path runs against generated fixtures of increasing size. A path fails
+when it issues more queries than its budget, or when its query count grows
+with the data size, which is the signature of an N+1 pattern.
+"""
+
+import re
+from collections import Counter
+
+import frappe
+from frappe.utils import add_days, get_first_day, today
+
+from resource_management.benchmarks.data_generator import NAME_PREFIX, clear, generate
+from resource_management.benchmarks.suite import get_run_key
+
+# Employees per fixture, the other record counts scale with it
+DEFAULT_SIZES = (20, 80)
+ASSIGNMENTS_PER_EMPLOYEE = 10
+
+class QueryCounter:
+    """Record every statement sent through frappe.db.sql while active"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __enter__(self):
+        self._sql = frappe.db.sql
+
+        def sql(query, *args, **kwargs):
+            self.queries.append(str(query))
+            return self._sql(query, *args, **kwargs)
+
+        frappe.db.sql = sql
+        return self
+
+    def __exit__(self, *exc):
+        frappe.db.sql = self._sql
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    def most_common(self, n=3):
+        """Repeated statement shapes, with literals stripped, to point at the N+1"""
+        shapes = Counter(re.sub(r"'[^']*'|\b\d+\b", "?", " ".join(query.split())) for query in self.queries)
+        return [(shape[:120], count) for shape, count in shapes.most_common(n) if count > 1]
+
+def get_paths():
+    """(name, budget, callable) for every budgeted path, callables take no arguments"""
+    from resource_management.api.allocation_solver import solve_pending_allocations
+    from resource_management.api.availability_heatmap import get_availability_heatmap
+    from resource_management.api.capacity_simulator import simulate_allocations
+    from resource_management.resource_management.doctype.resource_allocation.resource_allocation import (
+        get_available_employees,
+    )
+    from resource_management.resource_management.doctype.resource_allocation_snapshot.resource_allocation_snapshot import (
+        materialize_monthly_snapshot,
+    )
+    from resource_management.resource_management.doctype.resource_overallocation.resource_overallocation import (
+        detect_overallocations,
+    )
+    from resource_management.resource_management.report.monthly_resource_allocation import (
+        monthly_resource_allocation,
+    )
+    from resource_management.resource_management.report.resource_allocation_status import (
+        resource_allocation_status,
+    )
+    from resource_management.scheduled_tasks import task_config
+    from resource_management.utils.cost_rates import sync_all_employee_rates
+
+    project = frappe.db.get_value("Project", {"name": ["like", NAME_PREFIX + "%"]}, "name")
+    employees = frappe.get_all("Employee",
+        filters={"name": ["like", NAME_PREFIX + "%"], "status": "Active"},
+        pluck="name",
+        limit=10,
+        order_by="name asc"
+    )
+    start_date, end_date = today(), add_days(today(), 60)
+    plan = [
+        {"employee": employee, "start_date": start_date, "end_date": end_date, "allocation_percentage": 20}
+        for employee in employees
+    ]
+
+    return [
+        # Whitelisted endpoints
+        ("get_available_employees", 10,
+            lambda: get_available_employees(project, start_date, end_date, 50)),
+        ("get_availability_heatmap", 5,
+            lambda: get_availability_heatmap()),
+        ("simulate_allocations", 8,
+            lambda: simulate_allocations(plan)),
+        ("solve_pending_allocations", 10,
+            lambda: solve_pending_allocations()),
+        ("resource_allocation_status", 5,
+            lambda: (resource_allocation_status.get_data({}), resource_allocation_status.get_chart_data({}))),
+        ("monthly_resource_allocation", 5,
+            lambda: monthly_resource_allocation.execute({})),
+        # Scheduled tasks
+        ("sync_all_employee_rates", 10,
+            sync_all_employee_rates),
+        ("send_upcoming_end_notifications", 5,
+            lambda: task_config.send_upcoming_end_notifications(run_key=get_run_key())),
+        ("update_employee_availability", 5,
+            lambda: task_config.update_employee_availability(run_key=get_run_key())),
+        ("send_allocation_summary", 5,
+            lambda: task_config.send_allocation_summary(run_key=get_run_key())),
+        ("detect_overallocations", 8,
+            detect_overallocations),
+        ("materialize_monthly_snapshot", 12,
+            lambda: materialize_monthly_snapshot(get_first_day(today()), force=True)),
+        # Writes, run last since they change the fixture
+        ("update_completed_assignments", 5,
+            lambda: task_config.update_completed_assignments(run_key=get_run_key())),
+    ]
+
+def count_queries(sizes=DEFAULT_SIZES, paths=None):
+    """Query count of every path at every fixture size, as {path: {size: (count, repeated statements)}}"""
+    frappe.flags.mute_emails = True
+    counts = {}
+    budgets = {}
+
+    try:
+        for size in sizes:
+            generate(
+                employees=size,
+                assignments=size * ASSIGNMENTS_PER_EMPLOYEE,
+                allocations=size,
+                projects=max(size // 10, 2)
+            )
+
+            for name, budget, fn in get_paths():
+                if paths and name not in paths:
+                    continue
+
+                budgets[name] = budget
+                if getattr(frappe.local, "request_cache", None) is not None:
+                    frappe.local.request_cache.clear()
+
+                with QueryCounter() as counter:
+                    try:
+                        fn()
+                    except Exception as e:
+                        print("{0} failed at size {1}: {2}".format(name, size, e))
+                        frappe.db.rollback()
+                counts.setdefault(name, {})[size] = (counter.count, counter.most_common())
+    finally:
+        clear()
+
+    return counts, budgets
+
+def run(sizes=None, paths=None):
+    """Check every path against its budget and constant-count requirement"""
+    if isinstance(sizes, str):
+        sizes = [int(size) for size in sizes.split(",")]
+    if isinstance(paths, str):
+        paths = [path.strip() for path in paths.split(",")]
+    sizes = sorted(sizes or DEFAULT_SIZES)
+
+    counts, budgets = count_queries(sizes, paths)
+
+    failures = []
+    for name, by_size in counts.items():
+        observed = [by_size[size][0] for size in sizes]
+        problems = []
+        if max(observed) > budgets[name]:
+            problems.append("over budget of {0}".format(budgets[name]))
+        if observed[-1] > observed[0]:
+            problems.append("grows with data size")
+
+        print("{0:<35} {1:<20} {2}".format(
+            name, " / ".join(str(count) for count in observed), "FAIL: " + ", ".join(problems) if problems else "ok"))
+
+        if problems:
+            for shape, repeated in by_size[sizes[-1]][1]:
+                print("    {0}x {1}".format(repeated, shape))
+            failures.append(name)
+
+    if failures:
+        frappe.throw("Query budget exceeded by: {0}".format(", ".join(failures)))
@@ -0,0 +1,211 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+"""
+Timings of the app's hot paths against the generated dataset
+
+    bench --site bench.local execute resource_management.benchmarks.suite.run --kwargs "{'label': 'before'}"
+    bench --site bench.local execute resource_management.benchmarks.suite.compare
+
+Every run is appended to private/benchmarks/results.jsonl in the site folder
+and compared with the previous run.
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import time
+
+import frappe
+from frappe.utils import add_days, flt, now, today
+
+from resource_management.benchmarks.data_generator import NAME_PREFIX
+
+RESULTS_FILE = "results.jsonl"
+
+# A change is reported as a regression above this ratio to the previous run
+REGRESSION_THRESHOLD = 1.2
+
+def get_cases():
+    """Benchmark cases as (name, callable), imported lazily so a broken module only fails its case"""
+    from resource_management.api.availability_heatmap import get_availability_heatmap
+    from resource_management.api.capacity_simulator import simulate_allocations
+    from resource_management.resource_management.doctype.resource_allocation.resource_allocation import (
+        get_available_employees,
+    )
+    from resource_management.resource_management.doctype.resource_overallocation.resource_overallocation import (
+        detect_overallocations,
+    )
+    from resource_management.resource_management.report.resource_allocation_status import (
+        resource_allocation_status,
+    )
+    from resource_management.scheduled_tasks import task_config
+
+    project = frappe.db.get_value("Project", {"name": ["like", NAME_PREFIX + "%"]}, "name")
+    employees = frappe.get_all("Employee",
+        filters={"name": ["like", NAME_PREFIX + "%"], "status": "Active"},
+        pluck="name",
+        limit=50,
+        order_by="name asc"
+    )
+    start_date, end_date = today(), add_days(today(), 90)
+
+    plan = [
+        {"employee": employee, "start_date": start_date, "end_date": end_date, "allocation_percentage": 25}
+        for employee in employees
+    ]
+
+    return [
+        ("get_available_employees",
+            lambda: get_available_employees(project, start_date, end_date, 50)),
+        ("resource_allocation_status.get_data",
+            lambda: resource_allocation_status.get_data({})),
+        ("resource_allocation_status.get_chart_data",
+            lambda: resource_allocation_status.get_chart_data({})),
+        ("get_availability_heatmap",
+            lambda: get_availability_heatmap()),
+        ("simulate_allocations (50 lines)",
+            lambda: simulate_allocations(plan)),
+        ("task_config.update_employee_availability",
+            lambda: task_config.update_employee_availability(run_key=get_run_key())),
+        ("task_config.send_allocation_summary",
+            lambda: task_config.send_allocation_summary(run_key=get_run_key())),
+        ("detect_overallocations",
+            detect_overallocations),
+    ]
+
+def run(repeat=3, label=None, cases=None):
+    """Time every case repeat times, store the results and compare with the previous run"""
+    repeat = max(int(repeat), 1)
+    if isinstance(cases, str):
+        cases = [case.strip() for case in cases.split(",")]
+
+    # Notifications sent by the scheduler cases must not leave the machine
+    frappe.flags.mute_emails = True
+
+    results = {}
+    for name, fn in get_cases():
+        if cases and name not in cases:
+            continue
+
+        timings = []
+        error = None
+        for _ in range(repeat):
+            clear_request_caches()
+            started = time.perf_counter()
+            try:
+                fn()
+            except Exception as e:
+                error = str(e)
+                break
+            finally:
+                timings.append(time.perf_counter() - started)
+            frappe.db.rollback()
+
+        results[name] = summarize(timings, error)
+        print("{0:<45} {1}".format(name, format_result(results[name])))
+
+    record = {
+        "label": label,
+        "timestamp": now(),
+        "commit": get_commit(),
+        "dataset": get_dataset_size(),
+        "repeat": repeat,
+        "results": results
+    }
+
+    previous = load_results()
+    save_result(record)
+    if previous:
+        print_comparison(previous[-1], record)
+
+    return record
+
+def compare(baseline=-2, current=-1):
+    """Compare two stored runs, by index or label"""
+    results = load_results()
+    if len(results) < 2:
+        print("At least two stored runs are needed to compare")
+        return
+
+    print_comparison(find_run(results, baseline), find_run(results, current))
+
+def summarize(timings, error=None):
+    timings = sorted(timings)
+    summary = {
+        "runs": len(timings),
+        "min": flt(timings[0], 4) if timings else None,
+        "median": flt(statistics.median(timings), 4) if timings else None,
+        "max": flt(timings[-1], 4) if timings else None
+    }
+    if error:
+        summary["error"] = error
+    return summary
+
+def format_result(result):
+    if result.get("error"):
+        return "ERROR {0}".format(result["error"])
+    return "min {0:.4f}s  median {1:.4f}s  max {2:.4f}s".format(result["min"], result["median"], result["max"])
+
+def print_comparison(baseline, current):
+    print("\nCompared with {0} ({1})".format(baseline.get("label") or baseline["timestamp"], baseline.get("commit") or "-"))
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if not before or not before.get("median") or not result.get("median"):
+            continue
+
+        ratio = result["median"] / before["median"]
+        flag = "  REGRESSION" if ratio > REGRESSION_THRESHOLD else ""
+        print("{0:<45} {1:.4f}s -> {2:.4f}s  x{3:.2f}{4}".format(
+            name, before["median"], result["median"], ratio, flag))
+
+def find_run(results, key):
+    if isinstance(key, int) or str(key).lstrip("-").isdigit():
+        return results[int(key)]
+
+    for result in reversed(results):
+        if result.get("label") == key:
+            return result
+    frappe.throw("No benchmark run labelled {0}".format(key))
+
+def get_run_key():
+    """A fresh run key, so the job ledger never skips a timed run as already done"""
+    return "benchmark-" + frappe.generate_hash(length=8)
+
+def clear_request_caches():
+    """Start each timed call cold, as a fresh request would"""
+    if getattr(frappe.local, "request_cache", None) is not None:
+        frappe.local.request_cache.clear()
+
+def get_dataset_size():
+    return {
+        doctype: frappe.db.count(doctype, {"name": ["like", NAME_PREFIX + "%"]})
+        for doctype in ("Employee", "Project", "Project Assignment", "Resource Allocation")
+    }
+
+def get_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=frappe.get_app_path("resource_management"),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+def get_results_path():
+    folder = frappe.get_site_path("private", "benchmarks")
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, RESULTS_FILE)
+
+def load_results():
+    path = get_results_path()
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def save_result(record):
+    with open(get_results_path(), "a") as f:
+        f.write(json.dumps(record, default=str) + "\n")
@@ -109,7 +109,55 @@ doc_events = {
 		"validate": "resource_management.api.resource_allocation.validate_resource_allocation_status_change",
 		"before_save": "resource_management.api.resource_allocation.before_save_resource_allocation",
 		"on_submit": "resource_management.api.resource_allocation.on_submit_resource_allocation",
-		"on_cancel": "resource_management.api.resource_allocation.on_cancel_resource_allocation"
+		"on_cancel": "resource_management.api.resource_allocation_permissions.on_cancel_resource_allocation"
+	},
+	"Project Assignment": {
+		"on_update": [
+			"resource_management.utils.report_cache.invalidate_on_assignment_change",
+			"resource_management.utils.availability_events.publish_on_assignment_change",
+			"resource_management.resource_management.doctype.resource_allocation_snapshot.resource_allocation_snapshot.mark_stale_on_assignment_change"
+		],
+		"on_submit": [
+			"resource_management.utils.report_cache.invalidate_on_assignment_change",
+			"resource_management.utils.availability_events.publish_on_assignment_change",
+			"resource_management.resource_management.doctype.resource_allocation_snapshot.resource_allocation_snapshot.mark_stale_on_assignment_change"
+		],
+		"on_update_after_submit": [
+			"resource_management.utils.report_cache.invalidate_on_assignment_change",
+			"resource_management.utils.availability_events.publish_on_assignment_change",
+			"resource_management.resource_management.doctype.resource_allocation_snapshot.resource_allocation_snapshot.mark_stale_on_assignment_change"
+		],
+		"on_cancel": [
+			"resource_management.utils.report_cache.invalidate_on_assignment_change",
+			"resource_management.utils.availability_events.publish_on_assignment_change",
+			"resource_management.resource_management.doctype.resource_allocation_snapshot.resource_allocation_snapshot.mark_stale_on_assignment_change"
+		],
+		"on_trash": [
+			"resource_management.utils.report_cache.invalidate_on_assignment_change",
+			"resource_management.utils.availability_events.publish_on_assignment_change",
+			"resource_management.resource_management.doctype.resource_allocation_snapshot.resource_allocation_snapshot.mark_stale_on_assignment_change"
+		]
+	},
+	"Employee": {
+		"on_update": [
+			"resource_management.utils.report_cache.invalidate_on_employee_change",
+			"resource_management.utils.cost_rates.record_rate_change",
+			"resource_management.utils.recosting.enqueue_recost_on_rate_change",
+			"resource_management.utils.roster.clear_roster_cache"
+		],
+		"on_trash": "resource_management.utils.roster.clear_roster_cache",
+		"after_rename": "resource_management.utils.roster.clear_roster_cache"
+	},
+	"User": {
+		"on_update": "resource_management.utils.roster.clear_roster_cache",
+		"on_trash": "resource_management.utils.roster.clear_roster_cache"
+	},
+	"Project": {
+		"on_update": "resource_management.utils.report_cache.invalidate_on_project_change"
+	},
+	"Holiday List": {
+		"on_update": "resource_management.utils.cost_engine.clear_holiday_cache",
+		"on_trash": "resource_management.utils.cost_engine.clear_holiday_cache"
 	}
 }
 
@@ -117,6 +165,9 @@ doc_events = {
 # ---------------
 
 scheduler_events = {
+	"hourly": [
+		"resource_management.scheduled_tasks.task_config.hourly"
+	],
 	"daily": [
 		"resource_management.scheduled_tasks.task_config.daily"
 	],
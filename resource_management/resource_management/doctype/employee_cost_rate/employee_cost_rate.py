@@ -0,0 +1,43 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+
+from resource_management.utils.cost_rates import clear_rate_cache, sync_employee_rate
+from resource_management.utils.recosting import enqueue_recost
+
+class EmployeeCostRate(Document):
+    def validate(self):
+        self.validate_duplicate_date()
+    
+    def validate_duplicate_date(self):
+        # Only one rate can start on a given day for an employee
+        existing = frappe.db.exists("Employee Cost Rate", {
+            "employee": self.employee,
+            "effective_from": self.effective_from,
+            "name": ["!=", self.name]
+        })
+        if existing:
+            frappe.throw(_("Employee {0} already has a cost rate effective from {1}").format(
+                self.employee, self.effective_from))
+    
+    def on_update(self):
+        self.update_employee_rate()
+        
+        previous = self.get_doc_before_save()
+        if previous and previous.employee != self.employee:
+            self.update_employee_rate(previous.employee)
+    
+    def after_delete(self):
+        self.update_employee_rate()
+    
+    def update_employee_rate(self, employee=None):
+        """Refresh the rate history cache, the employee's current rate and assignment costs"""
+        employee = employee or self.employee
+        clear_rate_cache(employee)
+        if not self.flags.skip_employee_sync:
+            sync_employee_rate(employee)
+            # Past-dated rates change costs even when today's rate stays the same
+            enqueue_recost(employee)
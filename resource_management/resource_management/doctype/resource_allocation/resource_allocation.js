@@ -2,6 +2,11 @@
 // For license information, please see license.txt
 
 frappe.ui.form.on('Resource Allocation', {
+    onload: function(frm) {
+        // Patch the employees table when assignments change elsewhere
+        subscribe_to_availability_changes();
+    },
+    
     refresh: function(frm) {
         // Set default requested_by to current user
         if (frm.doc.__islocal && !frm.doc.requested_by) {
@@ -219,13 +224,82 @@ function validate_dates(frm) {
     }
 }
 
+let availability_subscribed = false;
+
+function subscribe_to_availability_changes() {
+    if (availability_subscribed) {
+        return;
+    }
+    availability_subscribed = true;
+    
+    frappe.realtime.doctype_subscribe('Resource Allocation');
+    frappe.realtime.on('resource_availability_changed', function(data) {
+        let frm = cur_frm;
+        if (!frm || frm.doctype !== 'Resource Allocation' || frm.doc.status !== "Draft") {
+            return;
+        }
+        if (!frm.doc.project || !frm.doc.start_date || !frm.doc.end_date || !frm.doc.allocation_percentage) {
+            return;
+        }
+        
+        // A skipped version means a missed event, too many employees come without IDs
+        let missed = frm.availability_version && data.version !== frm.availability_version + 1;
+        frm.availability_version = data.version;
+        if (missed || !data.employees) {
+            update_available_employees(frm);
+            return;
+        }
+        
+        let affected = (frm.doc.available_employees_table || [])
+            .map(row => row.employee)
+            .filter(employee => data.employees.includes(employee));
+        if (affected.length) {
+            patch_available_employees(frm, affected);
+        }
+    });
+}
+
+function patch_available_employees(frm, employees) {
+    frappe.call({
+        method: "resource_management.resource_management.doctype.resource_allocation.resource_allocation.get_employee_availability",
+        args: {
+            employees: employees,
+            start_date: frm.doc.start_date,
+            end_date: frm.doc.end_date,
+            allocation_percentage: frm.doc.allocation_percentage,
+            current_allocation: frm.doc.name || ""
+        },
+        callback: function(r) {
+            if (!r.message) {
+                return;
+            }
+            
+            let updates = {};
+            r.message.forEach(emp => updates[emp.employee] = emp);
+            
+            frm.doc.available_employees_table.forEach(function(row) {
+                let emp = updates[row.employee];
+                if (emp) {
+                    row.current_allocation = emp.current_allocation;
+                    row.available_allocation = emp.available_allocation;
+                    row.hourly_cost_rate = emp.hourly_cost_rate;
+                    row.estimated_cost = emp.estimated_cost;
+                    row.is_available = emp.is_available;
+                }
+            });
+            
+            frm.refresh_field('available_employees_table');
+        }
+    });
+}
+
 function update_available_employees(frm) {
     if (!frm.doc.project || !frm.doc.start_date || !frm.doc.end_date || !frm.doc.allocation_percentage) {
         return;
     }
     
     frappe.call({
-        method: "resource_management.api.resource_allocation.get_available_employees",
+        method: "resource_management.resource_management.doctype.resource_allocation.resource_allocation.get_available_employees",
         args: {
             project: frm.doc.project,
             start_date: frm.doc.start_date,
@@ -2,9 +2,52 @@
 # For license information, please see license.txt
 
 import frappe
-from frappe.utils import date_diff, flt, getdate, today
+from frappe.model.document import Document
+from frappe.utils import flt, getdate, today
 from frappe import _
 
+from resource_management.resource_management.doctype.resource_allocation_event.resource_allocation_event import log_event
+from resource_management.utils.cost_engine import estimate_costs
+from resource_management.utils.metrics import instrument
+from resource_management.utils.roster import get_active_employees, get_user_full_name
+
+class ResourceAllocation(Document):
+    def validate(self):
+        self.set_estimated_costs()
+    
+    def set_estimated_costs(self):
+        """Price every employee row in one pass from the in-memory document"""
+        if self.flags.skip_cost_estimate:
+            return
+        
+        if not (self.start_date and self.end_date and self.allocation_percentage):
+            return
+        
+        rows = [row for row in self.available_employees_table if row.employee]
+        if not rows:
+            return
+        
+        # Holiday calendars for all rows come from a single query
+        calendars = {
+            emp.name: emp for emp in frappe.get_all("Employee",
+                filters={"name": ["in", list({row.employee for row in rows})]},
+                fields=["name", "holiday_list", "company"]
+            )
+        }
+        
+        costs = estimate_costs([
+            {
+                "name": row.employee,
+                "hourly_cost_rate": row.hourly_cost_rate,
+                "holiday_list": calendars.get(row.employee, {}).get("holiday_list"),
+                "company": calendars.get(row.employee, {}).get("company")
+            }
+            for row in rows
+        ], self.start_date, self.end_date, self.allocation_percentage)
+        
+        for row, cost in zip(rows, costs):
+            row.estimated_cost = flt(cost, 2)
+
 @frappe.whitelist()
 def get_permission_query_conditions(user):
     """
@@ -116,41 +159,27 @@ def handle_final_permissions(doc, user, permission_type, requested_by, user_role
     return permission_type == 'read'
 
 @frappe.whitelist()
+@instrument("whitelist")
 def get_available_employees(project, start_date, end_date, allocation_percentage, current_allocation=""):
     """Get list of available and unavailable employees for the given period"""
     
     try:
         # Get all active employees
-        employees = frappe.get_all("Employee", 
-            filters={"status": "Active"},
-            fields=["name", "employee_name", "department", "hourly_cost_rate"]
-        )
+        employees = get_active_employees()
+        
+        # Working-day costs for the whole roster in one pass
+        estimated_costs = estimate_costs(employees, start_date, end_date, allocation_percentage)
+        
+        # Overlapping allocation of the whole roster in one query
+        allocated = get_allocated_percentages(start_date, end_date, current_allocation)
         
         available_employees = []
         unavailable_employees = []
         
-        for emp in employees:
-            # Get current allocations for this employee in the period
-            overlapping_allocations = frappe.db.sql("""
-                SELECT SUM(pa.allocation_percentage) as total_allocation
-                FROM `tabProject Assignment` pa
-                WHERE pa.employee = %s AND pa.status = 'Active'
-                AND pa.docstatus = 1
-                AND ((pa.start_date BETWEEN %s AND %s) OR (pa.end_date BETWEEN %s AND %s) 
-                    OR (pa.start_date <= %s AND pa.end_date >= %s))
-                AND pa.allocation_reference != %s
-            """, (emp.name, start_date, end_date, start_date, end_date, 
-                  start_date, end_date, current_allocation or ""), as_dict=1)
-            
-            current_allocation_pct = overlapping_allocations[0].total_allocation or 0
+        for emp, estimated_cost in zip(employees, estimated_costs):
+            current_allocation_pct = flt(allocated.get(emp.name))
             available_allocation_pct = 100 - current_allocation_pct
             
-            # Calculate estimated cost
-            working_days = date_diff(end_date, start_date) + 1
-            working_hours = working_days * 8
-            allocated_hours = working_hours * (float(allocation_percentage) / 100)
-            estimated_cost = allocated_hours * (emp.hourly_cost_rate or 0)
-            
             emp_data = {
                 "employee": emp.name,
                 "employee_name": emp.employee_name,
@@ -158,7 +187,7 @@ def get_available_employees(project, start_date, end_date, allocation_percentage
                 "current_allocation": current_allocation_pct,
                 "available_allocation": available_allocation_pct,
                 "hourly_cost_rate": emp.hourly_cost_rate or 0,
-                "estimated_cost": estimated_cost
+                "estimated_cost": flt(estimated_cost)
             }
             
             # Check if employee is available for the requested allocation
@@ -183,6 +212,67 @@ def get_available_employees(project, start_date, end_date, allocation_percentage
         frappe.throw(_("Error loading available employees. Please try again."))
 
 @frappe.whitelist()
+@instrument("whitelist")
+def get_employee_availability(employees, start_date, end_date, allocation_percentage, current_allocation=""):
+    """Availability rows of a few employees, used to patch open forms after a realtime change"""
+    if isinstance(employees, str):
+        employees = frappe.parse_json(employees)
+    if not employees:
+        return []
+
+    employee_rows = get_active_employees(employees)
+    if not employee_rows:
+        return []
+
+    allocated = get_allocated_percentages(start_date, end_date, current_allocation,
+        [emp.name for emp in employee_rows])
+
+    estimated_costs = estimate_costs(employee_rows, start_date, end_date, allocation_percentage)
+
+    rows = []
+    for emp, estimated_cost in zip(employee_rows, estimated_costs):
+        current_allocation_pct = flt(allocated.get(emp.name))
+        available_allocation_pct = 100 - current_allocation_pct
+        rows.append({
+            "employee": emp.name,
+            "employee_name": emp.employee_name,
+            "department": emp.department,
+            "current_allocation": current_allocation_pct,
+            "available_allocation": available_allocation_pct,
+            "hourly_cost_rate": emp.hourly_cost_rate or 0,
+            "estimated_cost": flt(estimated_cost),
+            "is_available": 1 if available_allocation_pct >= flt(allocation_percentage) else 0
+        })
+
+    return rows
+
+def get_allocated_percentages(start_date, end_date, current_allocation="", employees=None):
+    """Active allocation percentage per employee overlapping a window, the given employees or everyone"""
+    conditions = ""
+    values = {
+        "start_date": start_date,
+        "end_date": end_date,
+        "current_allocation": current_allocation or ""
+    }
+
+    if employees is not None:
+        conditions = "AND pa.employee IN %(employees)s"
+        values["employees"] = tuple(employees)
+
+    return dict(frappe.db.sql("""
+        SELECT pa.employee, SUM(pa.allocation_percentage)
+        FROM `tabProject Assignment` pa
+        WHERE pa.status = 'Active'
+            AND pa.docstatus = 1
+            AND pa.start_date <= %(end_date)s
+            AND pa.end_date >= %(start_date)s
+            AND IFNULL(pa.allocation_reference, '') != %(current_allocation)s
+            {conditions}
+        GROUP BY pa.employee
+    """.format(conditions=conditions), values))
+
+@frappe.whitelist()
+@instrument("whitelist")
 def request_allocation(name, selected_employee):
     """Submit allocation request"""
     try:
@@ -211,6 +301,7 @@ def request_allocation(name, selected_employee):
         # Update status to Requested
         doc.status = "Requested"
         doc.save()
+        log_event("Requested", employee=selected_employee, project=doc.project, resource_allocation=doc.name)
         
         # Send notification to CGO
         send_notification_to_cgo(doc)
@@ -222,6 +313,7 @@ def request_allocation(name, selected_employee):
         frappe.throw(_("Error submitting request: {0}").format(str(e)))
 
 @frappe.whitelist()
+@instrument("whitelist")
 def approve_request(name):
     """Approve allocation request - CGO only"""
     try:
@@ -257,6 +349,7 @@ def approve_request(name):
         
         # Submit the document to create project assignment
         doc.submit()
+        log_event("Approved", employee=selected_emp_id, project=doc.project, resource_allocation=doc.name)
         
         # Send notification to requester
         send_approval_notification(doc)
@@ -268,6 +361,7 @@ def approve_request(name):
         frappe.throw(_("Error approving request: {0}").format(str(e)))
 
 @frappe.whitelist()
+@instrument("whitelist")
 def reject_request(name, rejection_reason):
     """Reject allocation request - CGO only"""
     try:
@@ -285,6 +379,9 @@ def reject_request(name, rejection_reason):
         existing_notes = doc.notes or ""
         doc.notes = f"{existing_notes}\n\nRejection Reason ({today()}): {rejection_reason}"
         doc.save()
+        selected = next((row.employee for row in doc.available_employees_table if row.select_employee), None)
+        log_event("Rejected", employee=selected, project=doc.project, resource_allocation=doc.name,
+            details=rejection_reason)
         
         # Send notification to requester
         send_rejection_notification(doc, rejection_reason)
@@ -316,7 +413,7 @@ def send_notification_to_cgo(doc):
                     
                     Request: {doc.name}
                     Project: {doc.project_name}
-                    Requested By: {frappe.get_value('User', doc.requested_by, 'full_name')}
+                    Requested By: {get_user_full_name(doc.requested_by)}
                     Period: {doc.start_date} to {doc.end_date}
                     Allocation: {doc.allocation_percentage}%
                     
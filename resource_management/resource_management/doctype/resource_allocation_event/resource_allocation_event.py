@@ -0,0 +1,79 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import add_days, cint, now, today
+
+EVENT_FIELDS = [
+    "name", "creation", "modified", "owner", "modified_by",
+    "event_type", "event_time", "user", "employee", "project",
+    "resource_allocation", "project_assignment", "details"
+]
+
+# Buffered events are written early once this many are pending
+EVENT_BUFFER_SIZE = 1000
+
+# Events are kept this long unless the site config sets
+# resource_management_event_retention_days
+DEFAULT_RETENTION_DAYS = 365
+PURGE_CHUNK_SIZE = 10000
+
+class ResourceAllocationEvent(Document):
+    pass
+
+def log_event(event_type, employee=None, project=None, resource_allocation=None, project_assignment=None, details=None):
+    """
+    Append a lifecycle event to the log
+    Events are buffered and bulk inserted right before the transaction commits,
+    so they are written together with the change they describe or not at all
+    """
+    buffer = get_event_buffer()
+    timestamp = now()
+    user = frappe.session.user
+    buffer.append((
+        frappe.generate_hash(length=10), timestamp, timestamp, user, user,
+        event_type, timestamp, user, employee, project,
+        resource_allocation, project_assignment, details
+    ))
+
+    if len(buffer) >= EVENT_BUFFER_SIZE:
+        flush_events()
+
+def get_event_buffer():
+    """Pending events of the current transaction, hooking the flush on first use"""
+    if getattr(frappe.local, "resource_allocation_events", None) is None:
+        frappe.local.resource_allocation_events = []
+        frappe.db.before_commit.add(flush_events)
+        frappe.db.after_rollback.add(discard_events)
+    return frappe.local.resource_allocation_events
+
+def flush_events():
+    """Write all pending events in one bulk insert"""
+    buffer = getattr(frappe.local, "resource_allocation_events", None)
+    frappe.local.resource_allocation_events = None
+    if buffer:
+        frappe.db.bulk_insert("Resource Allocation Event", EVENT_FIELDS, buffer)
+
+def discard_events():
+    """Events of a rolled back transaction never happened"""
+    frappe.local.resource_allocation_events = None
+
+def purge_old_events():
+    """Delete events past the retention period in chunks (daily task), returns the number deleted"""
+    days = cint(frappe.conf.get("resource_management_event_retention_days")) or DEFAULT_RETENTION_DAYS
+    cutoff = add_days(today(), -days)
+
+    deleted = 0
+    while True:
+        names = frappe.get_all("Resource Allocation Event",
+            filters={"event_time": ["<", cutoff]},
+            pluck="name",
+            limit=PURGE_CHUNK_SIZE
+        )
+        if not names:
+            return deleted
+
+        frappe.db.delete("Resource Allocation Event", {"name": ["in", names]})
+        frappe.db.commit()
+        deleted += len(names)
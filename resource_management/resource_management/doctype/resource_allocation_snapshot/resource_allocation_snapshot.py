@@ -0,0 +1,154 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import flt, get_first_day, get_last_day, getdate, now
+
+from resource_management.utils.archiver import get_table_source
+from resource_management.utils.metrics import instrument
+
+# Assignment fields that feed the monthly totals
+SNAPSHOT_SOURCE_FIELDS = ("employee", "project", "start_date", "end_date",
+    "allocation_percentage", "estimated_total_cost", "docstatus")
+
+SNAPSHOT_ENTRY_FIELDS = [
+    "name", "creation", "modified", "owner", "modified_by",
+    "snapshot", "period_start", "employee", "employee_name", "department",
+    "project", "project_name", "assignment_count", "allocated_days",
+    "person_days", "allocated_cost"
+]
+
+class ResourceAllocationSnapshot(Document):
+    pass
+
+def get_snapshot_period(date):
+    """Return the YYYY-MM period key for the month containing date"""
+    return getdate(date).strftime("%Y-%m")
+
+def materialize_monthly_snapshot(period_start, force=False):
+    """
+    Materialize allocation totals for one calendar month
+    A completed month is reused as is, a failed or forced run replaces its entries
+    """
+    period_start = get_first_day(period_start)
+    period_end = get_last_day(period_start)
+    period = get_snapshot_period(period_start)
+
+    if frappe.db.exists("Resource Allocation Snapshot", period):
+        snapshot = frappe.get_doc("Resource Allocation Snapshot", period)
+        if snapshot.status == "Completed" and not force:
+            return snapshot
+    else:
+        snapshot = frappe.get_doc({
+            "doctype": "Resource Allocation Snapshot",
+            "period": period,
+            "period_start": period_start,
+            "period_end": period_end,
+            "status": "Pending"
+        }).insert(ignore_permissions=True)
+        frappe.db.commit()
+
+    # Entries left behind by an interrupted run are replaced, never duplicated
+    frappe.db.delete("Resource Allocation Snapshot Entry", {"snapshot": period})
+
+    entries = get_monthly_totals(period_start, period_end)
+
+    timestamp = now()
+    user = frappe.session.user
+    frappe.db.bulk_insert("Resource Allocation Snapshot Entry", SNAPSHOT_ENTRY_FIELDS, [
+        (
+            frappe.generate_hash(length=10), timestamp, timestamp, user, user,
+            period, period_start, row.employee, row.employee_name, row.department,
+            row.project, row.project_name, row.assignment_count, row.allocated_days,
+            flt(row.person_days, 2), flt(row.allocated_cost, 2)
+        )
+        for row in entries
+    ])
+
+    snapshot.status = "Completed"
+    snapshot.entry_count = len(entries)
+    snapshot.total_person_days = flt(sum(flt(row.person_days) for row in entries), 2)
+    snapshot.total_cost = flt(sum(flt(row.allocated_cost) for row in entries), 2)
+    snapshot.save(ignore_permissions=True)
+    frappe.db.commit()
+
+    return snapshot
+
+def get_monthly_totals(period_start, period_end):
+    """
+    Aggregate the part of every assignment that falls inside the month
+    Archived assignments are included so rematerialized months keep their totals
+    """
+    assignments = get_table_source("Project Assignment", include_archived=True)
+    # The date predicates sit on pa so they reach both branches of the archive union
+    return frappe.db.sql("""
+        SELECT
+            pa.employee,
+            MAX(emp.employee_name) as employee_name,
+            MAX(emp.department) as department,
+            pa.project,
+            MAX(proj.project_name) as project_name,
+            COUNT(pa.name) as assignment_count,
+            SUM(DATEDIFF(LEAST(pa.end_date, %(period_end)s), GREATEST(pa.start_date, %(period_start)s)) + 1)
+                as allocated_days,
+            SUM((DATEDIFF(LEAST(pa.end_date, %(period_end)s), GREATEST(pa.start_date, %(period_start)s)) + 1)
+                * pa.allocation_percentage / 100) as person_days,
+            SUM(IFNULL(pa.estimated_total_cost, 0)
+                * (DATEDIFF(LEAST(pa.end_date, %(period_end)s), GREATEST(pa.start_date, %(period_start)s)) + 1)
+                / (DATEDIFF(pa.end_date, pa.start_date) + 1)) as allocated_cost
+        FROM
+            {assignments} pa
+        LEFT JOIN
+            `tabEmployee` emp ON pa.employee = emp.name
+        LEFT JOIN
+            `tabProject` proj ON pa.project = proj.name
+        WHERE
+            pa.start_date <= %(period_end)s
+            AND pa.end_date >= %(period_start)s
+            AND pa.docstatus = 1
+            AND pa.status != 'Cancelled'
+        GROUP BY
+            pa.employee, pa.project
+    """.format(assignments=assignments), {"period_start": period_start, "period_end": period_end}, as_dict=1)
+
+def get_stale_snapshots():
+    """Completed months whose assignments changed after they were materialized"""
+    return frappe.get_all("Resource Allocation Snapshot",
+        filters={"status": "Stale"},
+        pluck="period_start",
+        order_by="period_start asc"
+    )
+
+def refresh_stale_snapshots():
+    """Rematerialize every stale month (daily task), returns the number refreshed"""
+    periods = get_stale_snapshots()
+    for period_start in periods:
+        materialize_monthly_snapshot(period_start, force=True)
+    return len(periods)
+
+def mark_snapshots_stale(start_date, end_date):
+    """Flag the completed months overlapping a date range for rematerialization"""
+    frappe.db.sql("""
+        UPDATE `tabResource Allocation Snapshot`
+        SET status = 'Stale'
+        WHERE status = 'Completed'
+            AND period_start <= %(end_date)s
+            AND period_end >= %(start_date)s
+    """, {"start_date": start_date, "end_date": end_date})
+
+@instrument("doc_event")
+def mark_stale_on_assignment_change(doc, method=None):
+    """A change to the months an assignment covers invalidates their snapshots"""
+    before = doc.get_doc_before_save()
+    if method == "on_update" and before:
+        was_cancelled, is_cancelled = before.status == "Cancelled", doc.status == "Cancelled"
+        if was_cancelled == is_cancelled and not any(
+                doc.has_value_changed(field) for field in SNAPSHOT_SOURCE_FIELDS):
+            return
+
+    dates = [getdate(d) for d in (doc.start_date, doc.end_date) if d]
+    if before:
+        dates += [getdate(d) for d in (before.start_date, before.end_date) if d]
+    if dates:
+        mark_snapshots_stale(min(dates), max(dates))
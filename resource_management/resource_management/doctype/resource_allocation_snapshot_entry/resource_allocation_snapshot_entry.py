@@ -0,0 +1,7 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+from frappe.model.document import Document
+
+class ResourceAllocationSnapshotEntry(Document):
+    pass
@@ -0,0 +1,161 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+from datetime import timedelta
+from itertools import groupby
+
+import numpy as np
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import flt, now, today
+
+from resource_management.utils.load_index import LoadIndex
+from resource_management.utils.metrics import instrument
+from resource_management.utils.roster import get_active_employees
+
+OVERALLOCATION_FIELDS = [
+    "name", "creation", "modified", "owner", "modified_by",
+    "employee", "employee_name", "department", "from_date", "to_date",
+    "peak_allocation", "excess_allocation", "assignments",
+    "suggested_assignment", "suggested_percentage", "suggested_employee",
+    "suggested_employee_free", "suggestion", "status", "detected_on"
+]
+
+class ResourceOverallocation(Document):
+    pass
+
+@instrument("scheduler")
+def detect_overallocations():
+    """Record every overbooked span with leveling suggestions (daily task)"""
+    # Sorted by the database, each employee's rows arrive together
+    assignments = frappe.db.sql("""
+        SELECT
+            pa.name, pa.employee, pa.project, pa.start_date, pa.end_date, pa.allocation_percentage
+        FROM
+            `tabProject Assignment` pa
+        WHERE
+            pa.status = 'Active'
+            AND pa.docstatus = 1
+            AND pa.end_date >= %s
+        ORDER BY
+            pa.employee, pa.start_date
+    """, today(), as_dict=1)
+
+    spans = []
+    for employee, rows in groupby(assignments, key=lambda row: row.employee):
+        spans.extend(find_overbooked_spans(employee, list(rows)))
+
+    employees = get_active_employees()
+    if spans:
+        add_leveling_suggestions(spans, employees, assignments)
+
+    save_overallocations(spans, {emp.name: emp for emp in employees})
+
+def find_overbooked_spans(employee, assignments):
+    """
+    Sweep one employee's assignments and return the spans booked above 100%
+    Events are sorted once, so the sweep is O(n log n) in the number of assignments
+    """
+    events = []
+    for assignment in assignments:
+        pct = flt(assignment.allocation_percentage)
+        events.append((assignment.start_date, pct, True, assignment))
+        events.append((assignment.end_date + timedelta(days=1), -pct, False, assignment))
+    events.sort(key=lambda event: event[0])
+
+    spans = []
+    active = {}
+    load = 0
+    span = None
+    i = 0
+
+    while i < len(events):
+        date = events[i][0]
+        # Apply every event of the day before looking at the load
+        while i < len(events) and events[i][0] == date:
+            _date, pct, is_start, assignment = events[i]
+            load += pct
+            if is_start:
+                active[assignment.name] = assignment
+            else:
+                active.pop(assignment.name, None)
+            i += 1
+
+        if load > 100.001:
+            if not span:
+                span = {"employee": employee, "from_date": date, "peak": load, "assignments": {}}
+            span["peak"] = max(span["peak"], load)
+            span["assignments"].update(active)
+            # Load only drops at a later event, there is always one while load > 0
+            span["to_date"] = events[i][0] - timedelta(days=1)
+        elif span:
+            spans.append(span)
+            span = None
+
+    return spans
+
+def add_leveling_suggestions(spans, employees, assignments):
+    """Suggest a percentage cut and an alternative employee for each span"""
+    window_start = min(span["from_date"] for span in spans)
+    window_end = max(max(a.end_date for a in span["assignments"].values()) for span in spans)
+    employee_ids = [emp.name for emp in employees]
+    departments = np.array([emp.department or "" for emp in employees])
+    load_index = LoadIndex(employee_ids, window_start, window_end, assignments)
+    positions = {employee: i for i, employee in enumerate(employee_ids)}
+
+    for span in spans:
+        excess = flt(span["peak"] - 100, 2)
+        # The most recently started assignment is the one to level
+        assignment = max(span["assignments"].values(), key=lambda a: (a.start_date, a.name))
+        pct = flt(assignment.allocation_percentage)
+
+        span["suggested_assignment"] = assignment.name
+        span["suggested_percentage"] = max(flt(pct - excess, 2), 0)
+
+        # Any other employee who can take the whole assignment, same department first
+        free = 100 - load_index.peak_load(max(assignment.start_date, window_start), assignment.end_date)
+        candidates = free >= pct
+        own = positions.get(span["employee"])
+        if own is not None:
+            candidates[own] = False
+            same_department = departments == departments[own]
+        else:
+            same_department = np.zeros(len(employee_ids), dtype=bool)
+
+        suggestion = [_("Reduce {0} from {1}% to {2}%").format(
+            assignment.name, pct, span["suggested_percentage"])]
+
+        if candidates.any():
+            score = np.where(candidates, free + same_department * 1000, -np.inf)
+            best = int(np.argmax(score))
+            span["suggested_employee"] = employee_ids[best]
+            span["suggested_employee_free"] = flt(free[best], 2)
+            suggestion.append(_("or move it to {0} ({1}% free)").format(
+                employees[best].employee_name or employee_ids[best], span["suggested_employee_free"]))
+
+        span["suggestion"] = " ".join(suggestion)
+
+def save_overallocations(spans, employees):
+    """Replace the open overallocation records with the spans just detected"""
+    frappe.db.delete("Resource Overallocation", {"status": "Open"})
+
+    timestamp = now()
+    user = frappe.session.user
+    frappe.db.bulk_insert("Resource Overallocation", OVERALLOCATION_FIELDS, [
+        (
+            frappe.generate_hash(length=10), timestamp, timestamp, user, user,
+            span["employee"],
+            employees.get(span["employee"], {}).get("employee_name"),
+            employees.get(span["employee"], {}).get("department"),
+            span["from_date"], span["to_date"],
+            flt(span["peak"], 2), flt(span["peak"] - 100, 2),
+            ", ".join(sorted(span["assignments"])),
+            span.get("suggested_assignment"), span.get("suggested_percentage"),
+            span.get("suggested_employee"), span.get("suggested_employee_free"),
+            span.get("suggestion"), "Open", today()
+        )
+        for span in spans
+    ])
+    frappe.db.commit()
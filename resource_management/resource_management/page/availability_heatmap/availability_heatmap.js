@@ -0,0 +1,111 @@
+// Copyright (c) 2023, Yazan Hamdan and contributors
+// For license information, please see license.txt
+
+frappe.pages['availability-heatmap'].on_page_load = function(wrapper) {
+    let page = frappe.ui.make_app_page({
+        parent: wrapper,
+        title: __('Availability Heatmap'),
+        single_column: true
+    });
+
+    let department = page.add_field({
+        fieldname: 'department',
+        label: __('Department'),
+        fieldtype: 'Link',
+        options: 'Department',
+        change: () => load_heatmap(page)
+    });
+
+    let start_date = page.add_field({
+        fieldname: 'start_date',
+        label: __('From'),
+        fieldtype: 'Date',
+        default: frappe.datetime.get_today(),
+        change: () => load_heatmap(page)
+    });
+
+    let weeks = page.add_field({
+        fieldname: 'weeks',
+        label: __('Weeks'),
+        fieldtype: 'Int',
+        default: 13,
+        change: () => load_heatmap(page)
+    });
+
+    page.filters = {department, start_date, weeks};
+    page.heatmap = $('<div class="availability-heatmap" style="overflow-x: auto;"></div>').appendTo(page.main);
+
+    load_heatmap(page);
+};
+
+function load_heatmap(page) {
+    frappe.call({
+        method: "resource_management.api.availability_heatmap.get_availability_heatmap",
+        args: {
+            department: page.filters.department.get_value(),
+            start_date: page.filters.start_date.get_value(),
+            weeks: page.filters.weeks.get_value()
+        },
+        freeze: true,
+        callback: function(r) {
+            if (r.message) {
+                render_heatmap(page.heatmap, r.message);
+            }
+        }
+    });
+}
+
+function decode_row(encoded) {
+    // [value, count, value, count, ...] back to one value per week
+    let values = [];
+    for (let i = 0; i < encoded.length; i += 2) {
+        for (let n = 0; n < encoded[i + 1]; n++) {
+            values.push(encoded[i]);
+        }
+    }
+    return values;
+}
+
+function get_cell_color(free) {
+    if (free < 0) return '#ff5858';      // Overbooked
+    if (free < 20) return '#ffa726';     // Nearly full
+    if (free < 60) return '#fff3bf';     // Partly free
+    return '#d3f9d8';                    // Mostly free
+}
+
+function render_heatmap(container, data) {
+    if (!data.employees.length) {
+        container.html(`<p class="text-muted">${__("No active employees found")}</p>`);
+        return;
+    }
+
+    // Build the whole table as one string, a few thousand cells render at once
+    let header = data.weeks.map(week =>
+        `<th style="font-size: 11px; white-space: nowrap;">${frappe.datetime.str_to_user(week)}</th>`).join('');
+
+    let body = data.employees.map((emp, i) => {
+        let cells = decode_row(data.rows[i]).map(free =>
+            `<td style="background-color: ${get_cell_color(free)}; text-align: center; font-size: 11px;">${free}</td>`).join('');
+        return `<tr>
+                    <td style="white-space: nowrap;">
+                        <a href="/app/employee/${encodeURIComponent(emp[0])}">${frappe.utils.escape_html(emp[1] || emp[0])}</a>
+                    </td>
+                    <td class="text-muted" style="white-space: nowrap;">${frappe.utils.escape_html(emp[2] || '')}</td>
+                    ${cells}
+                </tr>`;
+    }).join('');
+
+    container.html(`
+        <p class="text-muted">${__("Free capacity % per week, based on the busiest day of each week")}</p>
+        <table class="table table-bordered table-condensed">
+            <thead>
+                <tr>
+                    <th>${__("Employee")}</th>
+                    <th>${__("Department")}</th>
+                    ${header}
+                </tr>
+            </thead>
+            <tbody>${body}</tbody>
+        </table>
+    `);
+}
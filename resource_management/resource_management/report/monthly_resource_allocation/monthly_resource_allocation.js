@@ -0,0 +1,42 @@
+// Copyright (c) 2023, Yazan Hamdan and contributors
+// For license information, please see license.txt
+
+// Snapshots exist only for closed months, the default range ends with the last one
+const last_closed_month_end = frappe.datetime.add_days(frappe.datetime.month_start(), -1);
+
+frappe.query_reports["Monthly Resource Allocation"] = {
+    "filters": [
+        {
+            "fieldname": "from_date",
+            "label": __("From Month"),
+            "fieldtype": "Date",
+            "default": last_closed_month_end.substring(0, 4) + "-01-01",
+            "reqd": 1
+        },
+        {
+            "fieldname": "to_date",
+            "label": __("To Month"),
+            "fieldtype": "Date",
+            "default": last_closed_month_end,
+            "reqd": 1
+        },
+        {
+            "fieldname": "employee",
+            "label": __("Employee"),
+            "fieldtype": "Link",
+            "options": "Employee"
+        },
+        {
+            "fieldname": "project",
+            "label": __("Project"),
+            "fieldtype": "Link",
+            "options": "Project"
+        },
+        {
+            "fieldname": "department",
+            "label": __("Department"),
+            "fieldtype": "Link",
+            "options": "Department"
+        }
+    ]
+};
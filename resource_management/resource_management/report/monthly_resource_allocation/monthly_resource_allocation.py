@@ -0,0 +1,160 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+from frappe.utils import add_days, add_months, get_first_day, getdate, nowdate
+
+def execute(filters=None):
+    if not filters:
+        filters = {}
+    
+    # Year to date up to the last closed month by default, built only from
+    # materialized months. The current month is snapshotted once it ends
+    filters = frappe._dict(filters)
+    filters.to_date = getdate(filters.get("to_date") or get_last_closed_month_end())
+    filters.from_date = get_first_day(filters.get("from_date") or filters.to_date.replace(month=1, day=1))
+    
+    columns = get_columns()
+    data = get_data(filters)
+    
+    return columns, data, get_missing_months_message(filters)
+
+def get_last_closed_month_end():
+    return add_days(get_first_day(nowdate()), -1)
+
+def get_columns():
+    """Return columns for the report"""
+    return [
+        {
+            "fieldname": "employee",
+            "label": _("Employee ID"),
+            "fieldtype": "Link",
+            "options": "Employee",
+            "width": 120
+        },
+        {
+            "fieldname": "employee_name",
+            "label": _("Employee Name"),
+            "fieldtype": "Data",
+            "width": 150
+        },
+        {
+            "fieldname": "department",
+            "label": _("Department"),
+            "fieldtype": "Link",
+            "options": "Department",
+            "width": 120
+        },
+        {
+            "fieldname": "project",
+            "label": _("Project"),
+            "fieldtype": "Link",
+            "options": "Project",
+            "width": 120
+        },
+        {
+            "fieldname": "project_name",
+            "label": _("Project Name"),
+            "fieldtype": "Data",
+            "width": 150
+        },
+        {
+            "fieldname": "months",
+            "label": _("Months"),
+            "fieldtype": "Int",
+            "width": 80
+        },
+        {
+            "fieldname": "allocated_days",
+            "label": _("Allocated Days"),
+            "fieldtype": "Int",
+            "width": 110
+        },
+        {
+            "fieldname": "person_days",
+            "label": _("Person Days"),
+            "fieldtype": "Float",
+            "width": 110
+        },
+        {
+            "fieldname": "allocated_cost",
+            "label": _("Allocated Cost"),
+            "fieldtype": "Currency",
+            "width": 130
+        }
+    ]
+
+def get_data(filters):
+    """Sum the monthly snapshot entries inside the requested months"""
+    conditions = get_conditions(filters)
+    
+    return frappe.db.sql("""
+        SELECT 
+            entry.employee,
+            MAX(entry.employee_name) as employee_name,
+            MAX(entry.department) as department,
+            entry.project,
+            MAX(entry.project_name) as project_name,
+            COUNT(DISTINCT entry.snapshot) as months,
+            SUM(entry.allocated_days) as allocated_days,
+            SUM(entry.person_days) as person_days,
+            SUM(entry.allocated_cost) as allocated_cost
+        FROM 
+            `tabResource Allocation Snapshot Entry` entry
+        WHERE 
+            entry.period_start BETWEEN %(from_date)s AND %(to_date)s
+            {conditions}
+        GROUP BY 
+            entry.employee, entry.project
+        ORDER BY 
+            allocated_cost DESC
+    """.format(conditions=conditions), filters, as_dict=1)
+
+def get_conditions(filters):
+    """Build conditions for SQL query based on filters"""
+    conditions = []
+    
+    if filters.get("employee"):
+        conditions.append(" AND entry.employee = %(employee)s")
+    
+    if filters.get("project"):
+        conditions.append(" AND entry.project = %(project)s")
+    
+    if filters.get("department"):
+        conditions.append(" AND entry.department = %(department)s")
+    
+    return " ".join(conditions)
+
+def get_missing_months_message(filters):
+    """Point out months in the range that are not materialized yet or are being refreshed"""
+    snapshots = dict(frappe.get_all("Resource Allocation Snapshot",
+        filters={
+            "status": ["in", ["Completed", "Stale"]],
+            "period_start": ["between", (filters.from_date, filters.to_date)]
+        },
+        fields=["period", "status"],
+        as_list=True
+    ))
+    
+    # The open month has no snapshot until it ends
+    last_closed = get_last_closed_month_end()
+    missing = []
+    month = filters.from_date
+    while month <= min(filters.to_date, last_closed):
+        period = month.strftime("%Y-%m")
+        if period not in snapshots:
+            missing.append(period)
+        month = add_months(month, 1)
+    
+    stale = sorted(period for period, status in snapshots.items() if status == "Stale")
+    
+    messages = []
+    if missing:
+        messages.append(_("No snapshot yet for: {0}").format(", ".join(missing)))
+    if stale:
+        messages.append(_("Refreshing after backdated changes: {0}").format(", ".join(stale)))
+    if filters.to_date > last_closed:
+        messages.append(_("The current month is included once it has ended"))
+    
+    return " ".join(messages) or None
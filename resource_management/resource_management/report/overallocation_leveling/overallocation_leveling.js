@@ -0,0 +1,37 @@
+// Copyright (c) 2023, Yazan Hamdan and contributors
+// For license information, please see license.txt
+
+frappe.query_reports["Overallocation Leveling"] = {
+    "filters": [
+        {
+            "fieldname": "employee",
+            "label": __("Employee"),
+            "fieldtype": "Link",
+            "options": "Employee"
+        },
+        {
+            "fieldname": "department",
+            "label": __("Department"),
+            "fieldtype": "Link",
+            "options": "Department"
+        },
+        {
+            "fieldname": "status",
+            "label": __("Status"),
+            "fieldtype": "Select",
+            "options": "\nOpen\nResolved",
+            "default": "Open"
+        }
+    ],
+    "formatter": function(value, row, column, data, default_formatter) {
+        value = default_formatter(value, row, column, data);
+        
+        // Highlight how far above capacity the employee is booked
+        if (column.fieldname == "peak_allocation" && data.peak_allocation > 100) {
+            let color = data.peak_allocation > 150 ? 'red' : 'orange';
+            value = "<span style='color:" + color + "; font-weight:bold'>" + value + "</span>";
+        }
+        
+        return value;
+    }
+};
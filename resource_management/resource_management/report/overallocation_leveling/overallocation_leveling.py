@@ -0,0 +1,111 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+
+def execute(filters=None):
+    if not filters:
+        filters = {}
+    
+    columns = get_columns()
+    data = get_data(filters)
+    
+    return columns, data
+
+def get_columns():
+    """Return columns for the report"""
+    return [
+        {
+            "fieldname": "employee",
+            "label": _("Employee ID"),
+            "fieldtype": "Link",
+            "options": "Employee",
+            "width": 120
+        },
+        {
+            "fieldname": "employee_name",
+            "label": _("Employee Name"),
+            "fieldtype": "Data",
+            "width": 150
+        },
+        {
+            "fieldname": "department",
+            "label": _("Department"),
+            "fieldtype": "Link",
+            "options": "Department",
+            "width": 120
+        },
+        {
+            "fieldname": "from_date",
+            "label": _("From Date"),
+            "fieldtype": "Date",
+            "width": 100
+        },
+        {
+            "fieldname": "to_date",
+            "label": _("To Date"),
+            "fieldtype": "Date",
+            "width": 100
+        },
+        {
+            "fieldname": "peak_allocation",
+            "label": _("Peak Allocation %"),
+            "fieldtype": "Percent",
+            "width": 110
+        },
+        {
+            "fieldname": "assignments",
+            "label": _("Responsible Assignments"),
+            "fieldtype": "Data",
+            "width": 200
+        },
+        {
+            "fieldname": "suggested_assignment",
+            "label": _("Assignment to Adjust"),
+            "fieldtype": "Link",
+            "options": "Project Assignment",
+            "width": 130
+        },
+        {
+            "fieldname": "suggested_percentage",
+            "label": _("Suggested %"),
+            "fieldtype": "Percent",
+            "width": 100
+        },
+        {
+            "fieldname": "suggested_employee",
+            "label": _("Alternative Employee"),
+            "fieldtype": "Link",
+            "options": "Employee",
+            "width": 130
+        },
+        {
+            "fieldname": "suggestion",
+            "label": _("Suggestion"),
+            "fieldtype": "Data",
+            "width": 300
+        },
+        {
+            "fieldname": "name",
+            "label": _("Record"),
+            "fieldtype": "Link",
+            "options": "Resource Overallocation",
+            "width": 100
+        }
+    ]
+
+def get_data(filters):
+    """Overbooked spans recorded by the daily detector"""
+    query_filters = {}
+    for field in ("employee", "department", "status"):
+        if filters.get(field):
+            query_filters[field] = filters.get(field)
+    
+    return frappe.get_all("Resource Overallocation",
+        filters=query_filters,
+        fields=["name", "employee", "employee_name", "department", "from_date", "to_date",
+            "peak_allocation", "assignments", "suggested_assignment", "suggested_percentage",
+            "suggested_employee", "suggestion"],
+        order_by="peak_allocation desc, from_date asc"
+    )
@@ -40,8 +40,49 @@ frappe.query_reports["Resource Allocation Status"] = {
             "label": __("Status"),
             "fieldtype": "Select",
             "options": "\nActive\nCompleted\nCancelled"
+        },
+        {
+            "fieldname": "include_archived",
+            "label": __("Include Archived"),
+            "fieldtype": "Check",
+            "default": 0
         }
     ],
+    "onload": function(report) {
+        // Large histories are exported in the background instead of through the grid
+        report.page.add_inner_button(__("Export History"), function() {
+            frappe.prompt([
+                {
+                    fieldname: 'file_format',
+                    label: __('Format'),
+                    fieldtype: 'Select',
+                    options: 'CSV\nParquet',
+                    default: 'CSV',
+                    reqd: 1
+                }
+            ],
+            function(values) {
+                frappe.call({
+                    method: "resource_management.api.assignment_export.export_assignment_history",
+                    args: {
+                        file_format: values.file_format,
+                        filters: report.get_values()
+                    },
+                    callback: function(r) {
+                        if (r.message) {
+                            frappe.show_alert({
+                                message: r.message.message,
+                                indicator: 'blue'
+                            });
+                        }
+                    }
+                });
+            },
+            __('Export Assignment History'),
+            __('Export')
+            );
+        });
+    },
     "formatter": function(value, row, column, data, default_formatter) {
         value = default_formatter(value, row, column, data);
         
@@ -3,18 +3,26 @@
 
 import frappe
 from frappe import _
-from frappe.utils import getdate, nowdate, add_days, date_diff, flt
+from frappe.utils import flt
+
+from resource_management.utils.archiver import get_table_source
+from resource_management.utils.report_cache import get_cached_report, get_cache_message
+
+# Projects shown individually in the cost chart, the rest are grouped as "Other"
+CHART_TOP_PROJECTS = 7
 
 def execute(filters=None):
     if not filters:
         filters = {}
         
     columns = get_columns()
-    data = get_data(filters)
     
-    chart_data = get_chart_data(data)
+    # Rows and chart are cached per filters and permission scope
+    (data, chart_data), cache_info = get_cached_report(
+        "Resource Allocation Status", filters,
+        lambda: (get_data(filters), get_chart_data(filters)))
     
-    return columns, data, None, chart_data
+    return columns, data, get_cache_message(cache_info), chart_data
 
 def get_columns():
     """Return columns for the report"""
@@ -94,8 +102,9 @@ def get_columns():
 def get_data(filters):
     """Get data based on filters"""
     conditions = get_conditions(filters)
+    assignments = get_table_source("Project Assignment", filters.get("include_archived"))
     
-    # Query for Project Assignments
+    # Query for Project Assignments, remaining days are computed by the database
     data = frappe.db.sql("""
         SELECT 
             pa.employee,
@@ -107,10 +116,11 @@ def get_data(filters):
             pa.end_date,
             pa.allocation_percentage,
             pa.status,
+            GREATEST(DATEDIFF(pa.end_date, CURDATE()), 0) as remaining_days,
             pa.estimated_total_cost as estimated_cost,
             pa.name as assignment_id
         FROM 
-            `tabProject Assignment` pa
+            {assignments} pa
         LEFT JOIN 
             `tabEmployee` emp ON pa.employee = emp.name
         LEFT JOIN 
@@ -120,17 +130,7 @@ def get_data(filters):
             {conditions}
         ORDER BY 
             pa.start_date DESC
-    """.format(conditions=conditions), as_dict=1)
-    
-    # Calculate remaining days for each assignment
-    today = getdate(nowdate())
-    for row in data:
-        end_date = getdate(row.end_date)
-        
-        if today > end_date:
-            row.remaining_days = 0
-        else:
-            row.remaining_days = date_diff(end_date, today)
+    """.format(conditions=conditions, assignments=assignments), filters, as_dict=1)
     
     return data
 
@@ -139,49 +139,73 @@ def get_conditions(filters):
     conditions = []
     
     if filters.get("employee"):
-        conditions.append(" AND pa.employee = '{0}'".format(filters.get("employee")))
+        conditions.append(" AND pa.employee = %(employee)s")
     
     if filters.get("project"):
-        conditions.append(" AND pa.project = '{0}'".format(filters.get("project")))
+        conditions.append(" AND pa.project = %(project)s")
     
     if filters.get("department"):
-        conditions.append(" AND emp.department = '{0}'".format(filters.get("department")))
+        conditions.append(" AND emp.department = %(department)s")
     
     if filters.get("status"):
-        conditions.append(" AND pa.status = '{0}'".format(filters.get("status")))
+        conditions.append(" AND pa.status = %(status)s")
     
     if filters.get("from_date"):
-        conditions.append(" AND pa.start_date >= '{0}'".format(filters.get("from_date")))
+        conditions.append(" AND pa.start_date >= %(from_date)s")
     
     if filters.get("to_date"):
-        conditions.append(" AND pa.end_date <= '{0}'".format(filters.get("to_date")))
+        conditions.append(" AND pa.end_date <= %(to_date)s")
     
     return " ".join(conditions)
 
-def get_chart_data(data):
+def get_chart_data(filters):
     """Generate chart data for the report"""
-    if not data:
-        return None
+    conditions = get_conditions(filters)
+    assignments = get_table_source("Project Assignment", filters.get("include_archived"))
     
-    # Prepare data for Project-wise allocation chart
-    projects = {}
-    for row in data:
-        project = row.project_name or row.project
-        if project in projects:
-            projects[project] += flt(row.estimated_cost)
-        else:
-            projects[project] = flt(row.estimated_cost)
+    # Project-wise cost totals, the largest projects are kept and the rest
+    # are folded into a single "Other" slice. Grouping is by project ID so
+    # projects sharing a name stay apart, labels are applied afterwards
+    projects = frappe.db.sql("""
+        SELECT 
+            IF(ranked.project_rank <= %(chart_top_projects)s, ranked.project, NULL) as project,
+            MAX(ranked.project_label) as project_label,
+            SUM(ranked.total_cost) as total_cost
+        FROM (
+            SELECT 
+                pa.project,
+                IFNULL(MAX(proj.project_name), pa.project) as project_label,
+                SUM(IFNULL(pa.estimated_total_cost, 0)) as total_cost,
+                ROW_NUMBER() OVER (ORDER BY SUM(IFNULL(pa.estimated_total_cost, 0)) DESC) as project_rank
+            FROM 
+                {assignments} pa
+            LEFT JOIN 
+                `tabEmployee` emp ON pa.employee = emp.name
+            LEFT JOIN 
+                `tabProject` proj ON pa.project = proj.name
+            WHERE 
+                pa.docstatus = 1
+                {conditions}
+            GROUP BY 
+                pa.project
+        ) ranked
+        GROUP BY 
+            IF(ranked.project_rank <= %(chart_top_projects)s, ranked.project, NULL)
+        ORDER BY 
+            MIN(ranked.project_rank)
+    """.format(conditions=conditions, assignments=assignments), dict(filters,
+        chart_top_projects=CHART_TOP_PROJECTS), as_dict=1)
     
-    project_labels = list(projects.keys())
-    project_values = [projects[project] for project in project_labels]
+    if not projects:
+        return None
     
     chart = {
         "type": "donut",
         "data": {
-            "labels": project_labels,
+            "labels": [row.project_label if row.project else _("Other") for row in projects],
             "datasets": [
                 {
-                    "values": project_values
+                    "values": [flt(row.total_cost) for row in projects]
                 }
             ]
         },
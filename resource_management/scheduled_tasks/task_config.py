@@ -2,80 +2,180 @@
 # For license information, please see license.txt
 
 import frappe
-from frappe.utils import today, getdate, add_days, date_diff
+from frappe.utils import today, getdate, add_days, add_months, date_diff, flt, get_first_day
+
+from resource_management.resource_management.doctype.resource_allocation_event.resource_allocation_event import (
+    log_event,
+    purge_old_events,
+)
+from resource_management.resource_management.doctype.resource_allocation_snapshot.resource_allocation_snapshot import (
+    materialize_monthly_snapshot,
+    refresh_stale_snapshots,
+)
+from resource_management.resource_management.doctype.resource_overallocation.resource_overallocation import (
+    detect_overallocations,
+)
+from resource_management.utils.archiver import archive_old_allocations
+from resource_management.utils.cost_rates import sync_all_employee_rates
+from resource_management.utils.job_runner import get_interrupted_runs, run_chunked_job, run_once
+from resource_management.utils.metrics import instrument
+from resource_management.utils.roster import get_active_employees
 
 def all():
     """Jobs to run on every scheduler iteration"""
     pass
 
+@instrument("scheduler")
 def daily():
-    """Jobs to run daily"""
-    update_completed_assignments()
-    send_upcoming_end_notifications()
-    update_employee_availability()
+    """Jobs to run daily, independent jobs run in parallel on the long queue"""
+    run_key = today()
+    for job_name, dependencies in DAILY_JOBS.items():
+        if not dependencies:
+            enqueue_job(job_name, run_key)
 
+@instrument("scheduler")
 def hourly():
     """Jobs to run hourly"""
-    pass
+    resume_interrupted_runs()
 
+@instrument("scheduler")
 def weekly():
     """Jobs to run weekly"""
-    send_allocation_summary()
+    run_job("send_allocation_summary")
 
+@instrument("scheduler")
 def monthly():
     """Jobs to run monthly"""
-    generate_monthly_resource_report()
+    run_job("generate_monthly_resource_report")
+    enqueue_job("archive_old_allocations", today()[:7])
+
+def run_job(job_name, run_key=None):
+    """Run one registered job, a failure is recorded in its Resource Job Run and does not stop the others"""
+    try:
+        JOBS[job_name](run_key)
+    except Exception as e:
+        frappe.log_error(
+            f"Scheduled job {job_name} failed: {str(e)}",
+            "Resource Scheduled Job Error"
+        )
+
+def enqueue_job(job_name, run_key):
+    """Queue a registered job, at most once at a time per run"""
+    frappe.enqueue(
+        "resource_management.scheduled_tasks.task_config.run_job_and_dependents",
+        queue="long",
+        job_id=f"resource_job::{job_name}::{run_key}",
+        deduplicate=True,
+        job=job_name,
+        run_key=run_key
+    )
 
-def update_completed_assignments():
+def run_job_and_dependents(job, run_key):
+    """Background job entry point, queues the jobs this one unblocks"""
+    run_job(job, run_key)
+    enqueue_ready_dependents(job, run_key)
+
+def enqueue_ready_dependents(job_name, run_key):
+    """Queue every daily job whose dependencies have all completed for this run"""
+    dependents = [
+        dependent for dependent, dependencies in DAILY_JOBS.items()
+        if job_name in dependencies
+    ]
+    if not dependents:
+        return
+
+    completed = set(frappe.get_all("Resource Job Run",
+        filters={"run_key": run_key, "status": "Completed"},
+        pluck="job_name"
+    ))
+    for dependent in dependents:
+        if dependent not in completed and all(d in completed for d in DAILY_JOBS[dependent]):
+            enqueue_job(dependent, run_key)
+
+def resume_interrupted_runs():
+    """Pick failed or abandoned runs up again from their last checkpoint"""
+    for run in get_interrupted_runs():
+        if run.job_name in JOBS:
+            enqueue_job(run.job_name, run.run_key)
+
+def get_week_key(date=None):
+    """ISO week a weekly run covers, e.g. 2026-W42"""
+    year, week, _weekday = getdate(date or today()).isocalendar()
+    return f"{year}-W{week:02d}"
+
+@instrument("scheduler")
+def update_completed_assignments(run_key=None):
     """Update assignments that have passed their end date"""
-    # Get all active assignments that have ended
-    ended_assignments = frappe.get_all("Project Assignment", 
+    run_chunked_job("update_completed_assignments", run_key or today(),
+        get_ended_assignments, complete_assignments)
+
+def get_ended_assignments(after, limit):
+    """Next chunk of active assignments that have ended"""
+    return frappe.get_all("Project Assignment", 
         filters={
             "status": "Active",
             "end_date": ["<", today()],
-            "docstatus": 1
+            "docstatus": 1,
+            "name": [">", after]
         },
-        fields=["name", "project", "employee"]
+        fields=["name", "project", "employee"],
+        order_by="name asc",
+        limit=limit
     )
-    
-    # Update status to completed
+
+def complete_assignments(ended_assignments):
+    """Update status to completed, the chunk commits as a whole"""
     for assignment in ended_assignments:
         try:
             doc = frappe.get_doc("Project Assignment", assignment.name)
             doc.status = "Completed"
             doc.save()
-            frappe.db.commit()
             
-            # Log the completion
-            frappe.log_error(
-                f"Automatically completed assignment {doc.name} for employee {doc.employee} on project {doc.project}",
-                "Resource Assignment Update"
-            )
+            log_event("Completed", employee=doc.employee, project=doc.project,
+                resource_allocation=doc.allocation_reference, project_assignment=doc.name)
         except Exception as e:
             frappe.log_error(
                 f"Failed to complete assignment {assignment.name}: {str(e)}",
                 "Resource Assignment Update Error"
             )
 
-def send_upcoming_end_notifications():
+@instrument("scheduler")
+def send_upcoming_end_notifications(run_key=None):
     """Send notifications for assignments ending soon"""
-    # Get assignments ending in the next 7 days
-    today_date = getdate(today())
-    upcoming_end = frappe.get_all("Project Assignment",
+    run_chunked_job("send_upcoming_end_notifications", run_key or today(),
+        get_upcoming_end_assignments, notify_upcoming_end)
+
+def get_upcoming_end_assignments(after, limit):
+    """Next chunk of assignments ending in the next 7 days"""
+    return frappe.get_all("Project Assignment",
         filters={
             "status": "Active",
             "end_date": ["between", (today(), add_days(today(), 7))],
-            "docstatus": 1
+            "docstatus": 1,
+            "name": [">", after]
         },
-        fields=["name", "project", "project_name", "employee", "employee_name", "end_date"]
+        fields=["name", "project", "project_name", "employee", "employee_name", "end_date"],
+        order_by="name asc",
+        limit=limit
     )
+
+def notify_upcoming_end(upcoming_end):
+    """Send the notifications of one chunk, mail is queued in the chunk's transaction"""
+    today_date = getdate(today())
+    
+    # Project managers of the whole chunk in one query
+    project_manager_emails = dict(frappe.get_all("Project",
+        filters={"name": ["in", list({assignment.project for assignment in upcoming_end})]},
+        fields=["name", "project_manager_email"],
+        as_list=True
+    ))
     
     # Send notifications
     for assignment in upcoming_end:
         days_left = date_diff(assignment.end_date, today_date)
         
         # Get project manager
-        project_manager_email = frappe.db.get_value("Project", assignment.project, "project_manager_email")
+        project_manager_email = project_manager_emails.get(assignment.project)
         
         if project_manager_email:
             try:
@@ -100,66 +200,82 @@ def send_upcoming_end_notifications():
                     "Resource Assignment Notification Error"
                 )
 
-def update_employee_availability():
+@instrument("scheduler")
+def update_employee_availability(run_key=None):
     """Update employee availability calculation"""
-    # Get all employees with hourly cost rate
-    employees = frappe.get_all("Employee", 
-        filters={"hourly_cost_rate": [">", 0]},
-        fields=["name"]
-    )
+    if not has_availability_field():
+        return
     
-    today_date = getdate(today())
+    run_chunked_job("update_employee_availability", run_key or today(),
+        get_costed_employees, update_availability)
+
+def has_availability_field():
+    """Only sites with the custom field store the figure"""
+    return frappe.db.exists("Custom Field", {"dt": "Employee", "fieldname": "current_allocation_percentage"})
+
+def get_costed_employees(after, limit):
+    """Next chunk of employees with hourly cost rate"""
+    return frappe.get_all("Employee", 
+        filters={"hourly_cost_rate": [">", 0], "name": [">", after]},
+        fields=["name"],
+        order_by="name asc",
+        limit=limit
+    )
+
+def update_availability(employees):
+    """Total allocation today of one chunk of employees, in one query and one bulk update"""
+    # Calculate total allocation
+    totals = dict(frappe.db.sql("""
+        SELECT pa.employee, SUM(pa.allocation_percentage)
+        FROM `tabProject Assignment` pa
+        WHERE pa.employee IN %(employees)s
+            AND pa.status = 'Active'
+            AND pa.start_date <= %(today)s
+            AND pa.end_date >= %(today)s
+            AND pa.docstatus = 1
+        GROUP BY pa.employee
+    """, {"employees": tuple(emp.name for emp in employees), "today": today()}))
     
-    # Update availability for each employee
-    for emp in employees:
-        try:
-            # Get active assignments
-            active_assignments = frappe.get_all("Project Assignment",
-                filters={
-                    "employee": emp.name,
-                    "status": "Active",
-                    "start_date": ["<=", today()],
-                    "end_date": [">=", today()],
-                    "docstatus": 1
-                },
-                fields=["allocation_percentage"]
-            )
-            
-            # Calculate total allocation
-            total_allocation = sum([a.allocation_percentage for a in active_assignments])
-            
-            # Update employee document if it has the field
-            if frappe.db.exists("Custom Field", {"dt": "Employee", "fieldname": "current_allocation_percentage"}):
-                frappe.db.set_value("Employee", emp.name, "current_allocation_percentage", total_allocation)
-        
-        except Exception as e:
-            frappe.log_error(
-                f"Failed to update availability for employee {emp.name}: {str(e)}",
-                "Employee Availability Update Error"
-            )
+    frappe.db.bulk_update("Employee", {
+        emp.name: {"current_allocation_percentage": totals.get(emp.name) or 0}
+        for emp in employees
+    }, update_modified=False)
+
+@instrument("scheduler")
+def send_allocation_summary(run_key=None):
+    """Send weekly allocation summary to CGO and HR Manager, once per week"""
+    run_once("send_allocation_summary", run_key or get_week_key(), build_and_send_allocation_summary)
 
-def send_allocation_summary():
-    """Send weekly allocation summary to CGO and HR Manager"""
-    # Get list of employees and their allocations
-    employees_data = frappe.db.sql("""
-        SELECT 
-            e.name as employee,
-            e.employee_name,
-            e.department,
-            COUNT(pa.name) as assignment_count,
-            SUM(pa.allocation_percentage) as total_allocation
-        FROM 
-            `tabEmployee` e
-        LEFT JOIN 
-            `tabProject Assignment` pa ON e.name = pa.employee AND pa.status = 'Active' 
-                AND pa.start_date <= CURDATE() AND pa.end_date >= CURDATE() AND pa.docstatus = 1
-        WHERE 
-            e.status = 'Active'
-        GROUP BY 
-            e.name
-        ORDER BY 
-            total_allocation DESC
-    """, as_dict=1)
+def build_and_send_allocation_summary():
+    """Build the summary table and mail it"""
+    # Today's allocation per employee in one grouped query, names from the cached roster
+    allocations = {
+        row.employee: row for row in frappe.db.sql("""
+            SELECT 
+                pa.employee,
+                COUNT(pa.name) as assignment_count,
+                SUM(pa.allocation_percentage) as total_allocation
+            FROM 
+                `tabProject Assignment` pa
+            WHERE 
+                pa.status = 'Active' AND pa.start_date <= CURDATE() AND pa.end_date >= CURDATE()
+                AND pa.docstatus = 1
+            GROUP BY 
+                pa.employee
+        """, as_dict=1)
+    }
+    
+    employees_data = [
+        frappe._dict(
+            employee=emp.name,
+            employee_name=emp.employee_name,
+            department=emp.department,
+            assignment_count=allocations[emp.name].assignment_count if emp.name in allocations else 0,
+            total_allocation=allocations[emp.name].total_allocation if emp.name in allocations else None
+        )
+        for emp in get_active_employees()
+    ]
+    employees_data.sort(key=lambda emp: flt(emp.total_allocation), reverse=True)
     
     # Prepare HTML table
     table_rows = ""
@@ -234,52 +350,88 @@ def send_allocation_summary():
                 "Resource Allocation Summary Error"
             )
 
-def generate_monthly_resource_report():
-    """Generate monthly resource allocation report"""
-    # This will be scheduled to run automatically every month
-    month_name = getdate(today()).strftime("%B %Y")
+@instrument("scheduler")
+def generate_monthly_resource_report(run_key=None):
+    """Materialize last month's allocation snapshot and notify CGO and HR Manager"""
+    # Always the previous calendar month, rerunning for the same month is a no-op
+    period_start = getdate(run_key + "-01") if run_key else get_first_day(add_months(today(), -1))
+    run_once("generate_monthly_resource_report", period_start.strftime("%Y-%m"),
+        lambda: materialize_and_notify(period_start))
+
+def materialize_and_notify(period_start):
+    """Materialize one month and mail the report link unless already done"""
+    month_name = period_start.strftime("%B %Y")
     
-    try:
-        # Generate report
-        report = frappe.get_doc({
-            "doctype": "Prepared Report",
-            "report_name": f"Resource Allocation Status - {month_name}",
-            "ref_report_doctype": "Resource Allocation Status",
-            "report_type": "Script Report",
-            "filters_json": f'{{"from_date":"{add_days(today(), -30)}", "to_date":"{today()}"}}',
-        })
-        
-        report.insert()
-        
-        # Notify relevant users
-        recipients = []
-        cgo_emails = frappe.get_all("User", 
-            filters={"role_profile_name": "CGO"},
-            fields=["email"]
-        )
+    snapshot = materialize_monthly_snapshot(period_start)
+    
+    if snapshot.notified:
+        return
+    
+    # Notify relevant users
+    recipients = []
+    cgo_emails = frappe.get_all("User", 
+        filters={"role_profile_name": "CGO"},
+        fields=["email"]
+    )
+    
+    hr_manager_emails = frappe.get_all("User",
+        filters={"role_profile_name": "HR Manager"},
+        fields=["email"]
+    )
+    
+    recipients = [u.email for u in cgo_emails + hr_manager_emails]
+    
+    if recipients:
+        report_url = "/app/query-report/Monthly Resource Allocation?from_date={0}&to_date={1}".format(
+            period_start.replace(month=1), snapshot.period_end)
         
-        hr_manager_emails = frappe.get_all("User",
-            filters={"role_profile_name": "HR Manager"},
-            fields=["email"]
+        frappe.sendmail(
+            recipients=recipients,
+            subject=f"Monthly Resource Allocation Report - {month_name}",
+            message=f"""
+                <p>Hello,</p>
+                <p>The monthly resource allocation snapshot for {month_name} has been generated.</p>
+                <ul>
+                    <li>Entries: {snapshot.entry_count}</li>
+                    <li>Person Days: {snapshot.total_person_days}</li>
+                    <li>Allocated Cost: {snapshot.total_cost}</li>
+                </ul>
+                <p>You can access the year-to-date report by clicking on the following link:</p>
+                <p><a href="{report_url}">Monthly Resource Allocation</a></p>
+                <p>Regards,<br>Resource Management System</p>
+            """
         )
-        
-        recipients = [u.email for u in cgo_emails + hr_manager_emails]
-        
-        if recipients:
-            frappe.sendmail(
-                recipients=recipients,
-                subject=f"Monthly Resource Allocation Report - {month_name}",
-                message=f"""
-                    <p>Hello,</p>
-                    <p>The monthly resource allocation report for {month_name} has been generated.</p>
-                    <p>You can access the report by clicking on the following link:</p>
-                    <p><a href="/app/prepared-report/{report.name}">{report.report_name}</a></p>
-                    <p>Regards,<br>Resource Management System</p>
-                """
-            )
     
-    except Exception as e:
-        frappe.log_error(
-            f"Failed to generate monthly resource report: {str(e)}",
-            "Resource Report Generation Error"
-        )
+    frappe.db.set_value("Resource Allocation Snapshot", snapshot.name, "notified", 1)
+
+# Registered jobs, called with their run key so interrupted runs can be resumed
+JOBS = {
+    "sync_all_employee_rates": lambda run_key: run_once(
+        "sync_all_employee_rates", run_key or today(), sync_all_employee_rates),
+    "update_completed_assignments": update_completed_assignments,
+    "send_upcoming_end_notifications": send_upcoming_end_notifications,
+    "update_employee_availability": update_employee_availability,
+    "detect_overallocations": lambda run_key: run_once(
+        "detect_overallocations", run_key or today(), detect_overallocations),
+    "send_allocation_summary": send_allocation_summary,
+    "generate_monthly_resource_report": generate_monthly_resource_report,
+    "archive_old_allocations": archive_old_allocations,
+    # Ledger names of the archiver's phases, resuming either reruns the archiver
+    "archive_project_assignments": archive_old_allocations,
+    "archive_resource_allocations": archive_old_allocations,
+    "purge_allocation_events": lambda run_key: run_once(
+        "purge_allocation_events", run_key or today(), purge_old_events),
+    "refresh_stale_snapshots": lambda run_key: run_once(
+        "refresh_stale_snapshots", run_key or today(), refresh_stale_snapshots),
+}
+
+# Daily jobs and the jobs that must complete before each of them
+DAILY_JOBS = {
+    "sync_all_employee_rates": [],
+    "update_completed_assignments": [],
+    "send_upcoming_end_notifications": [],
+    "update_employee_availability": ["update_completed_assignments"],
+    "detect_overallocations": ["update_completed_assignments"],
+    "purge_allocation_events": [],
+    "refresh_stale_snapshots": [],
+}
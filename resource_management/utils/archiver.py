@@ -0,0 +1,123 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.utils import add_days, cint, today
+from frappe.utils.caching import request_cache
+
+from resource_management.utils.job_runner import run_chunked_job
+
+# Archive tables mirror the hot tables they take rows from
+ARCHIVE_TABLES = {
+    "Project Assignment": "_archive_project_assignment",
+    "Resource Allocation": "_archive_resource_allocation",
+    "Resource Allocation Employee": "_archive_resource_allocation_employee",
+}
+
+# Records are archived this long after their end date unless the site config
+# sets resource_management_archive_after_days
+DEFAULT_ARCHIVE_AFTER_DAYS = 730
+
+ARCHIVE_CHUNK_SIZE = 1000
+
+def archive_old_allocations(run_key=None):
+    """
+    Move old finished assignments and closed allocations into the archive tables (monthly task)
+    Each phase keeps its own run ledger record, a rerun skips the completed one.
+    Assignments go first so the allocations they referenced become archivable.
+    """
+    run_key = run_key or today()[:7]
+    ensure_archive_tables()
+
+    run_chunked_job("archive_project_assignments", run_key,
+        get_archivable_assignments, archive_assignments, chunk_size=ARCHIVE_CHUNK_SIZE)
+    run_chunked_job("archive_resource_allocations", run_key,
+        get_archivable_allocations, archive_allocations, chunk_size=ARCHIVE_CHUNK_SIZE)
+
+def get_archive_cutoff():
+    """Records ending before this date are archived"""
+    days = cint(frappe.conf.get("resource_management_archive_after_days")) or DEFAULT_ARCHIVE_AFTER_DAYS
+    return add_days(today(), -days)
+
+def ensure_archive_tables():
+    """Create missing archive tables with the schema of their hot table"""
+    for doctype, archive_table in ARCHIVE_TABLES.items():
+        frappe.db.sql_ddl("CREATE TABLE IF NOT EXISTS `{0}` LIKE `tab{1}`".format(archive_table, doctype))
+
+def get_archivable_assignments(after, limit):
+    """Next chunk of completed or cancelled assignments older than the cutoff"""
+    return frappe.db.sql("""
+        SELECT name
+        FROM `tabProject Assignment`
+        WHERE status IN ('Completed', 'Cancelled')
+            AND end_date < %(cutoff)s
+            AND name > %(after)s
+        ORDER BY name
+        LIMIT %(limit)s
+    """, {"cutoff": get_archive_cutoff(), "after": after, "limit": limit}, as_dict=1)
+
+def get_archivable_allocations(after, limit):
+    """Next chunk of approved or rejected allocations older than the cutoff that no assignment references anymore"""
+    return frappe.db.sql("""
+        SELECT ra.name
+        FROM `tabResource Allocation` ra
+        WHERE ra.status IN ('Approved', 'Rejected')
+            AND ra.end_date < %(cutoff)s
+            AND ra.name > %(after)s
+            AND NOT EXISTS (
+                SELECT 1 FROM `tabProject Assignment` pa
+                WHERE pa.allocation_reference = ra.name
+            )
+        ORDER BY ra.name
+        LIMIT %(limit)s
+    """, {"cutoff": get_archive_cutoff(), "after": after, "limit": limit}, as_dict=1)
+
+def archive_assignments(assignments):
+    move_to_archive("Project Assignment", "name", [row.name for row in assignments])
+
+def archive_allocations(allocations):
+    names = [row.name for row in allocations]
+    move_to_archive("Resource Allocation Employee", "parent", names)
+    move_to_archive("Resource Allocation", "name", names)
+
+def move_to_archive(doctype, key_field, values):
+    """Copy rows into the archive table and delete them from the hot table, inside the chunk's transaction"""
+    if not values:
+        return
+
+    columns = ", ".join("`{0}`".format(column) for column in get_archive_columns(doctype))
+    params = {"values": tuple(values)}
+
+    # Rows copied by an earlier interrupted attempt are already there
+    frappe.db.sql("""
+        INSERT IGNORE INTO `{archive_table}` ({columns})
+        SELECT {columns} FROM `tab{doctype}` WHERE `{key_field}` IN %(values)s
+    """.format(archive_table=ARCHIVE_TABLES[doctype], columns=columns, doctype=doctype, key_field=key_field), params)
+
+    frappe.db.sql("""
+        DELETE FROM `tab{doctype}` WHERE `{key_field}` IN %(values)s
+    """.format(doctype=doctype, key_field=key_field), params)
+
+@request_cache
+def get_archive_columns(doctype):
+    """Columns present in both the hot and the archive table, in hot table order"""
+    archive_columns = {
+        row[0] for row in frappe.db.sql("SHOW COLUMNS FROM `{0}`".format(ARCHIVE_TABLES[doctype]))
+    }
+    return [column for column in frappe.db.get_table_columns(doctype) if column in archive_columns]
+
+@request_cache
+def archive_table_exists(doctype):
+    return bool(frappe.db.sql("SHOW TABLES LIKE %s", ARCHIVE_TABLES[doctype]))
+
+def get_table_source(doctype, include_archived=False):
+    """
+    Table expression to select from, optionally with the archived rows appended
+    Used as FROM {source} alias in place of the plain table name
+    """
+    if not include_archived or not archive_table_exists(doctype):
+        return "`tab{0}`".format(doctype)
+
+    columns = ", ".join("`{0}`".format(column) for column in get_archive_columns(doctype))
+    return "(SELECT {columns} FROM `tab{doctype}` UNION ALL SELECT {columns} FROM `{archive_table}`)".format(
+        columns=columns, doctype=doctype, archive_table=ARCHIVE_TABLES[doctype])
@@ -0,0 +1,50 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+import frappe
+
+from resource_management.utils.metrics import instrument
+
+AVAILABILITY_EVENT = "resource_availability_changed"
+AVAILABILITY_VERSION_KEY = "resource_management:availability_version"
+
+# Larger changes are published without employee IDs, open forms reload in full
+MAX_EVENT_EMPLOYEES = 500
+
+@instrument("doc_event")
+def publish_on_assignment_change(doc, method=None):
+    """Queue the employees whose availability a Project Assignment change affects"""
+    employees = {doc.employee}
+    before = doc.get_doc_before_save()
+    if before:
+        employees.add(before.employee)
+    queue_availability_change(employees)
+
+def queue_availability_change(employees):
+    """
+    Collect changed employees for the current transaction
+    One event is published after the commit, nothing when it rolls back
+    """
+    pending = getattr(frappe.local, "changed_availability", None)
+    if pending is None:
+        pending = frappe.local.changed_availability = set()
+        frappe.db.after_commit.add(publish_availability_change)
+        frappe.db.after_rollback.add(discard_availability_change)
+    pending.update(employee for employee in employees if employee)
+
+def publish_availability_change():
+    """Publish the changed employees with a new version to open Resource Allocation forms"""
+    employees = getattr(frappe.local, "changed_availability", None)
+    frappe.local.changed_availability = None
+    if not employees:
+        return
+
+    cache = frappe.cache()
+    version = cache.incr(cache.make_key(AVAILABILITY_VERSION_KEY))
+    frappe.publish_realtime(AVAILABILITY_EVENT, {
+        "employees": sorted(employees) if len(employees) <= MAX_EVENT_EMPLOYEES else None,
+        "version": version
+    }, doctype="Resource Allocation")
+
+def discard_availability_change():
+    frappe.local.changed_availability = None
@@ -0,0 +1,217 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+import numpy as np
+
+import frappe
+from frappe.utils import flt, getdate
+from frappe.utils.caching import request_cache
+
+from resource_management.utils.cost_rates import get_rate_periods, get_rate_segments
+from resource_management.utils.metrics import instrument
+
+HOURS_PER_DAY = 8
+
+# Used for employees without a Holiday List, Monday to Friday
+DEFAULT_WEEKMASK = "1111100"
+
+# Holiday Lists already contain their weekly offs, so every weekday counts
+# inside a list's from/to range
+HOLIDAY_LIST_WEEKMASK = "1111111"
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+HOLIDAY_CACHE_KEY = "resource_management:holiday_calendars"
+
+def estimate_costs(employees, start_date, end_date, allocation_percentage):
+    """
+    Estimated cost of every employee for the same allocation window
+    employees are dicts with name, hourly_cost_rate and optionally holiday_list
+    and company, the result is a NumPy array in the same order
+    """
+    return estimate_window_costs([
+        dict(emp,
+            employee=emp.get("name"),
+            start_date=start_date,
+            end_date=end_date,
+            allocation_percentage=allocation_percentage
+        )
+        for emp in employees
+    ])
+
+def estimate_window_costs(windows):
+    """
+    Estimated cost of allocation windows that can differ per row
+    windows are dicts with employee, start_date, end_date, allocation_percentage,
+    hourly_cost_rate (used when the employee has no rate history) and optionally
+    holiday_list and company
+    """
+    if not windows:
+        return np.zeros(0)
+
+    percentages = np.array([flt(window.get("allocation_percentage")) for window in windows]) / 100
+    return np.round(get_rate_days(windows) * HOURS_PER_DAY * percentages, 2)
+
+def estimate_cost_matrix(employees, windows):
+    """
+    Estimated cost of every employee for every window, as a windows x employees matrix
+    employees are dicts as for estimate_costs, windows have start_date, end_date and
+    allocation_percentage. Working days are counted once per window and calendar,
+    only employees with a rate history are priced segment by segment.
+    """
+    if not employees or not windows:
+        return np.zeros((len(windows), len(employees)))
+
+    calendars, calendar_index = np.unique(np.asarray(get_holiday_lists(employees)), return_inverse=True)
+    starts = [getdate(window.get("start_date")) for window in windows]
+    ends = [getdate(window.get("end_date")) for window in windows]
+
+    working_days = count_working_days(
+        np.repeat(np.array(starts, dtype="datetime64[D]"), len(calendars)),
+        np.repeat(np.array(ends, dtype="datetime64[D]"), len(calendars)),
+        np.tile(calendars, len(windows))
+    ).reshape(len(windows), len(calendars))
+
+    rates = np.array([flt(emp.get("hourly_cost_rate")) for emp in employees])
+    rate_days = working_days[:, calendar_index] * rates
+
+    rate_periods = get_rate_periods([emp.get("name") for emp in employees])
+    with_history = [i for i, emp in enumerate(employees) if rate_periods[emp.get("name")][0]]
+    if with_history:
+        rate_days[:, with_history] = get_rate_days([
+            dict(employees[i], employee=employees[i].get("name"), start_date=start, end_date=end)
+            for start, end in zip(starts, ends)
+            for i in with_history
+        ], rate_periods).reshape(len(windows), len(with_history))
+
+    percentages = np.array([flt(window.get("allocation_percentage")) for window in windows]) / 100
+    return np.round(rate_days * HOURS_PER_DAY * percentages[:, None], 2)
+
+def get_rate_days(windows, rate_periods=None):
+    """
+    Sum of working days times hourly rate for each window
+    Each window is split at every rate change and all segments are counted
+    in a single business day pass
+    """
+    if rate_periods is None:
+        rate_periods = get_rate_periods([window.get("employee") for window in windows])
+    holiday_lists = get_holiday_lists(windows)
+
+    rows, segment_starts, segment_ends, segment_holiday_lists, segment_rates = [], [], [], [], []
+    for row, window in enumerate(windows):
+        for segment_start, segment_end, rate in get_rate_segments(
+            window.get("employee"), window.get("start_date"), window.get("end_date"),
+            window.get("hourly_cost_rate"), rate_periods
+        ):
+            rows.append(row)
+            segment_starts.append(segment_start)
+            segment_ends.append(segment_end)
+            segment_holiday_lists.append(holiday_lists[row])
+            segment_rates.append(rate)
+
+    working_days = count_working_days(segment_starts, segment_ends, segment_holiday_lists)
+    return np.bincount(rows, weights=working_days * np.array(segment_rates, dtype=float), minlength=len(windows))
+
+def count_working_days(start_dates, end_dates, holiday_lists):
+    """
+    Working days between each start and end date (both inclusive)
+    Rows are grouped by Holiday List so each calendar is counted in one pass
+    """
+    start_dates = np.asarray(start_dates, dtype="datetime64[D]")
+    # busday_count excludes the end date
+    end_dates = np.asarray(end_dates, dtype="datetime64[D]") + 1
+    holiday_lists = np.asarray([holiday_list or "" for holiday_list in holiday_lists])
+
+    working_days = np.zeros(len(start_dates), dtype=np.int64)
+    for holiday_list in np.unique(holiday_lists):
+        rows = holiday_lists == holiday_list
+        working_days[rows] = count_calendar_days(
+            start_dates[rows],
+            np.maximum(end_dates[rows], start_dates[rows]),
+            get_busday_calendars(str(holiday_list))
+        )
+
+    return working_days
+
+def count_calendar_days(start_dates, end_dates, calendars):
+    """
+    Working days from each start date up to each end date (exclusive) on one calendar
+    Days inside the Holiday List's range count on the list, days outside it on
+    the list's weekly off, or Monday to Friday when it has none
+    """
+    if calendars.covered_from is None:
+        return np.busday_count(start_dates, end_dates, busdaycal=calendars.outside)
+
+    inside_start = np.clip(start_dates, calendars.covered_from, calendars.covered_to)
+    inside_end = np.clip(end_dates, calendars.covered_from, calendars.covered_to)
+    before_end = np.maximum(np.minimum(end_dates, calendars.covered_from), start_dates)
+    after_start = np.minimum(np.maximum(start_dates, calendars.covered_to), end_dates)
+
+    return (
+        np.busday_count(start_dates, before_end, busdaycal=calendars.outside)
+        + np.busday_count(inside_start, inside_end, busdaycal=calendars.inside)
+        + np.busday_count(after_start, end_dates, busdaycal=calendars.outside)
+    )
+
+def get_holiday_lists(employees):
+    """Holiday List of each employee, falling back to the company default"""
+    return [
+        emp.get("holiday_list")
+        or (emp.get("company") and frappe.get_cached_value("Company", emp.get("company"), "default_holiday_list"))
+        or ""
+        for emp in employees
+    ]
+
+@request_cache
+def get_busday_calendars(holiday_list):
+    """
+    NumPy business day calendars for a Holiday List, built once per request
+    covered_from and covered_to (exclusive) bound the list's range, inside it
+    the list's own holidays apply and outside it the weekly off calendar
+    """
+    if not holiday_list:
+        return frappe._dict(covered_from=None, covered_to=None, inside=None,
+            outside=np.busdaycalendar(weekmask=DEFAULT_WEEKMASK))
+
+    calendar = get_holiday_calendar(holiday_list)
+    weekmask = DEFAULT_WEEKMASK
+    if calendar["weekly_off"] in WEEKDAYS:
+        weekmask = "".join("0" if day == calendar["weekly_off"] else "1" for day in WEEKDAYS)
+
+    return frappe._dict(
+        covered_from=np.datetime64(calendar["from_date"], "D") if calendar["from_date"] else None,
+        covered_to=np.datetime64(calendar["to_date"], "D") + 1 if calendar["to_date"] else None,
+        inside=np.busdaycalendar(
+            weekmask=HOLIDAY_LIST_WEEKMASK,
+            holidays=np.array(calendar["holidays"], dtype="datetime64[D]")
+        ),
+        outside=np.busdaycalendar(weekmask=weekmask)
+    )
+
+def get_holiday_calendar(holiday_list):
+    """Range, weekly off and holiday dates (ISO strings) of a Holiday List, cached in Redis per list"""
+    calendar = frappe.cache().hget(HOLIDAY_CACHE_KEY, holiday_list)
+    if calendar is None:
+        from_date, to_date, weekly_off = frappe.db.get_value("Holiday List", holiday_list,
+            ["from_date", "to_date", "weekly_off"]) or (None, None, None)
+        calendar = {
+            "from_date": str(from_date) if from_date else None,
+            "to_date": str(to_date) if to_date else None,
+            "weekly_off": weekly_off,
+            "holidays": [str(d) for d in frappe.get_all("Holiday",
+                filters={"parent": holiday_list, "parenttype": "Holiday List"},
+                pluck="holiday_date",
+                order_by="holiday_date"
+            )]
+        }
+        frappe.cache().hset(HOLIDAY_CACHE_KEY, holiday_list, calendar)
+
+    return calendar
+
+@instrument("doc_event")
+def clear_holiday_cache(doc=None, method=None):
+    """Drop cached holidays when a Holiday List changes"""
+    if doc:
+        frappe.cache().hdel(HOLIDAY_CACHE_KEY, doc.name)
+    else:
+        frappe.cache().delete_value(HOLIDAY_CACHE_KEY)
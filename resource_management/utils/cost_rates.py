@@ -0,0 +1,159 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+import pickle
+from bisect import bisect_right
+
+import frappe
+from frappe.utils import add_days, flt, getdate, today
+
+from resource_management.utils.metrics import instrument
+
+RATE_CACHE_KEY = "resource_management:cost_rates"
+
+def get_rate_periods(employees):
+    """
+    Rate history of each employee as two sorted arrays, (effective_from dates, rates)
+    Employees without history get empty arrays, missing entries are loaded in one query
+    """
+    employees = list(set(employees))
+    if not employees:
+        return {}
+
+    # Only the requested fields, in one round trip
+    cache = frappe.cache()
+    cached = cache.hmget(cache.make_key(RATE_CACHE_KEY), employees)
+
+    periods = {employee: pickle.loads(value) for employee, value in zip(employees, cached) if value is not None}
+    missing = [employee for employee in employees if employee not in periods]
+
+    if missing:
+        loaded = {employee: ([], []) for employee in missing}
+        for row in frappe.get_all("Employee Cost Rate",
+            filters={"employee": ["in", missing]},
+            fields=["employee", "effective_from", "hourly_cost_rate"],
+            order_by="employee asc, effective_from asc"
+        ):
+            dates, rates = loaded[row.employee]
+            dates.append(str(row.effective_from))
+            rates.append(flt(row.hourly_cost_rate))
+
+        cache_rate_periods(loaded)
+        periods.update(loaded)
+
+    # Dates are kept as ISO strings in Redis, bisect works on date objects
+    return {
+        employee: ([getdate(d) for d in dates], rates)
+        for employee, (dates, rates) in periods.items()
+    }
+
+def cache_rate_periods(periods):
+    """Write many rate histories to the cache in one pipeline"""
+    cache = frappe.cache()
+    key = cache.make_key(RATE_CACHE_KEY)
+    pipeline = cache.pipeline()
+    for employee, history in periods.items():
+        pipeline.hset(key, employee, pickle.dumps(history))
+    pipeline.execute()
+
+def get_rate_on(employee, date, fallback_rate=0, rate_periods=None):
+    """Hourly cost rate of an employee on a given date"""
+    if rate_periods is None:
+        rate_periods = get_rate_periods([employee])
+
+    dates, rates = rate_periods.get(employee) or ([], [])
+    if not dates:
+        return flt(fallback_rate)
+
+    # Dates before the first recorded rate use the earliest rate
+    return rates[max(bisect_right(dates, getdate(date)) - 1, 0)]
+
+def get_rate_segments(employee, start_date, end_date, fallback_rate=0, rate_periods=None):
+    """
+    Split an allocation window at every rate change
+    Returns a list of (segment_start, segment_end, hourly_cost_rate), both ends inclusive
+    """
+    if rate_periods is None:
+        rate_periods = get_rate_periods([employee])
+
+    start_date, end_date = getdate(start_date), getdate(end_date)
+    dates, rates = rate_periods.get(employee) or ([], [])
+    if not dates:
+        return [(start_date, end_date, flt(fallback_rate))]
+
+    segments = []
+    index = max(bisect_right(dates, start_date) - 1, 0)
+    segment_start = start_date
+
+    while index + 1 < len(dates) and dates[index + 1] <= end_date:
+        segments.append((segment_start, add_days(dates[index + 1], -1), rates[index]))
+        segment_start = dates[index + 1]
+        index += 1
+
+    segments.append((segment_start, end_date, rates[index]))
+    return segments
+
+def clear_rate_cache(employee=None):
+    """Drop the cached rate history of one employee or of everyone"""
+    if employee:
+        frappe.cache().hdel(RATE_CACHE_KEY, employee)
+    else:
+        frappe.cache().delete_value(RATE_CACHE_KEY)
+
+def sync_employee_rate(employee):
+    """Keep Employee.hourly_cost_rate equal to the rate effective today"""
+    current_rate = frappe.db.get_value("Employee", employee, "hourly_cost_rate")
+    rate_today = get_rate_on(employee, today(), current_rate)
+
+    if flt(rate_today) != flt(current_rate):
+        employee_doc = frappe.get_doc("Employee", employee)
+        employee_doc.hourly_cost_rate = rate_today
+        employee_doc.flags.from_cost_rate_history = True
+        employee_doc.save(ignore_permissions=True)
+
+@instrument("scheduler")
+def sync_all_employee_rates():
+    """Apply rates that became effective today (daily task)"""
+    for employee in frappe.get_all("Employee Cost Rate",
+        filters={"effective_from": today()},
+        pluck="employee",
+        distinct=True
+    ):
+        sync_employee_rate(employee)
+
+@instrument("doc_event")
+def record_rate_change(doc, method=None):
+    """
+    Employee on_update hook, a rate typed on the Employee becomes a dated history row
+    so allocations before today keep the previous rate
+    """
+    if doc.flags.from_cost_rate_history or not doc.has_value_changed("hourly_cost_rate"):
+        return
+
+    previous = doc.get_doc_before_save()
+    if not previous:
+        return
+
+    # Without any history the previous rate is recorded from the joining date
+    since = getdate(doc.date_of_joining or add_days(today(), -1))
+    if (previous.hourly_cost_rate and since < getdate(today())
+        and not frappe.db.exists("Employee Cost Rate", {"employee": doc.name})):
+        insert_rate(doc.name, since, previous.hourly_cost_rate)
+
+    existing = frappe.db.get_value("Employee Cost Rate", {"employee": doc.name, "effective_from": today()})
+    if existing:
+        frappe.db.set_value("Employee Cost Rate", existing, "hourly_cost_rate", doc.hourly_cost_rate)
+        clear_rate_cache(doc.name)
+    else:
+        insert_rate(doc.name, today(), doc.hourly_cost_rate)
+
+def insert_rate(employee, effective_from, hourly_cost_rate):
+    """Insert a history row without syncing it back to the Employee"""
+    rate = frappe.get_doc({
+        "doctype": "Employee Cost Rate",
+        "employee": employee,
+        "effective_from": effective_from,
+        "hourly_cost_rate": hourly_cost_rate
+    })
+    rate.flags.skip_employee_sync = True
+    rate.insert(ignore_permissions=True)
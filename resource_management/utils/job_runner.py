@@ -0,0 +1,138 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+import time
+import traceback
+
+import frappe
+from frappe.utils import add_to_date, cint, flt, get_datetime, now, now_datetime
+
+# Rows processed and committed together with their checkpoint
+DEFAULT_CHUNK_SIZE = 500
+
+# A Running record untouched for this long belongs to a dead worker
+STALE_AFTER_MINUTES = 30
+
+# Interrupted runs are retried this many times before they are left for a human
+MAX_ATTEMPTS = 3
+
+# Runs older than this are not resumed any more
+RESUME_WINDOW_DAYS = 2
+
+def run_chunked_job(job_name, run_key, fetch_chunk, process_chunk, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Run a job over keyset-ordered chunks, resuming after the last committed chunk
+    fetch_chunk(after, limit) returns rows ordered by name with name > after,
+    process_chunk(rows) does the work. Each chunk commits together with its
+    checkpoint, so a rerun of the same job_name and run_key never repeats work
+    that was committed (mail included). Returns the Resource Job Run record.
+    """
+    run = start_run(job_name, run_key)
+    if not run:
+        return None
+
+    started = time.perf_counter()
+    checkpoint = run.checkpoint or ""
+    chunks = cint(run.chunks)
+    rows_processed = cint(run.rows_processed)
+
+    try:
+        while True:
+            rows = fetch_chunk(checkpoint, chunk_size)
+            if not rows:
+                break
+
+            process_chunk(rows)
+            checkpoint = rows[-1].name
+            chunks += 1
+            rows_processed += len(rows)
+
+            frappe.db.set_value("Resource Job Run", run.name, {
+                "checkpoint": checkpoint,
+                "chunks": chunks,
+                "rows_processed": rows_processed
+            })
+            frappe.db.commit()
+
+            if len(rows) < chunk_size:
+                break
+    except Exception:
+        frappe.db.rollback()
+        finish_run(run, "Failed", started, error=traceback.format_exc())
+        raise
+
+    finish_run(run, "Completed", started)
+    return run
+
+def run_once(job_name, run_key, fn):
+    """Run a single-pass job at most once per run_key, recorded in the same ledger"""
+    run = start_run(job_name, run_key)
+    if not run:
+        return None
+
+    started = time.perf_counter()
+    try:
+        rows = fn()
+    except Exception:
+        frappe.db.rollback()
+        finish_run(run, "Failed", started, error=traceback.format_exc())
+        raise
+
+    if isinstance(rows, int):
+        frappe.db.set_value("Resource Job Run", run.name, {"rows_processed": rows, "chunks": 1})
+    finish_run(run, "Completed", started)
+    return run
+
+def start_run(job_name, run_key):
+    """
+    Create or claim the ledger record of a run
+    Returns None when the run already completed or is still alive in another worker
+    """
+    run_id = f"{job_name}::{run_key}"
+    if frappe.db.exists("Resource Job Run", run_id):
+        run = frappe.get_doc("Resource Job Run", run_id, for_update=True)
+        if run.status == "Completed":
+            return None
+        if run.status == "Running" and not is_stale(run):
+            return None
+    else:
+        run = frappe.get_doc({
+            "doctype": "Resource Job Run",
+            "run_id": run_id,
+            "job_name": job_name,
+            "run_key": str(run_key),
+            "started_at": now()
+        }).insert(ignore_permissions=True)
+
+    run.db_set({
+        "status": "Running",
+        "attempts": cint(run.attempts) + 1,
+        "error": None
+    })
+    frappe.db.commit()
+    return run
+
+def finish_run(run, status, started, error=None):
+    """Close an attempt, durations add up over attempts"""
+    run.db_set({
+        "status": status,
+        "finished_at": now(),
+        "duration": flt(run.duration) + round(time.perf_counter() - started, 3),
+        "error": error
+    })
+    frappe.db.commit()
+
+def is_stale(run):
+    return get_datetime(run.modified) < add_to_date(now_datetime(), minutes=-STALE_AFTER_MINUTES)
+
+def get_interrupted_runs():
+    """Failed or abandoned runs that are still worth resuming"""
+    runs = frappe.get_all("Resource Job Run",
+        filters={
+            "status": ["in", ["Running", "Failed"]],
+            "attempts": ["<", MAX_ATTEMPTS],
+            "creation": [">=", add_to_date(now_datetime(), days=-RESUME_WINDOW_DAYS)]
+        },
+        fields=["name", "job_name", "run_key", "status", "modified"]
+    )
+    return [run for run in runs if run.status == "Failed" or is_stale(run)]
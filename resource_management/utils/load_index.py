@@ -0,0 +1,114 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+import numpy as np
+
+import frappe
+from frappe.utils import date_diff, getdate
+
+def get_active_assignments(start_date, end_date, employees=None, exclude_allocation=None):
+    """All active assignments overlapping a window, fetched in one query"""
+    conditions = ""
+    values = {
+        "start_date": start_date,
+        "end_date": end_date,
+        "exclude_allocation": exclude_allocation or ""
+    }
+
+    if employees is not None:
+        if not employees:
+            return []
+        conditions += " AND pa.employee IN %(employees)s"
+        values["employees"] = tuple(employees)
+
+    return frappe.db.sql("""
+        SELECT
+            pa.name, pa.employee, pa.project, pa.start_date, pa.end_date, pa.allocation_percentage
+        FROM
+            `tabProject Assignment` pa
+        WHERE
+            pa.status = 'Active'
+            AND pa.docstatus = 1
+            AND pa.start_date <= %(end_date)s
+            AND pa.end_date >= %(start_date)s
+            AND IFNULL(pa.allocation_reference, '') != %(exclude_allocation)s
+            {conditions}
+    """.format(conditions=conditions), values, as_dict=1)
+
+class LoadIndex:
+    """
+    Daily allocation percentage per employee over a window, as an
+    employees x days matrix built by interval accumulation
+    """
+
+    def __init__(self, employees, start_date, end_date, assignments=()):
+        self.employees = list(employees)
+        self.start_date = getdate(start_date)
+        self.end_date = getdate(end_date)
+        self.days = date_diff(self.end_date, self.start_date) + 1
+        self.index = {employee: i for i, employee in enumerate(self.employees)}
+        self.load = np.zeros((len(self.employees), self.days))
+        self.add(assignments)
+
+    def add(self, assignments, sign=1):
+        """Accumulate assignments (dicts with employee, start_date, end_date, allocation_percentage)"""
+        rows, starts, ends, percentages = self.to_arrays(assignments)
+        if not len(rows):
+            return
+
+        # Difference array: +pct on the first day, -pct the day after the last
+        diff = np.zeros((len(self.employees), self.days + 1))
+        np.add.at(diff, (rows, starts), sign * percentages)
+        np.add.at(diff, (rows, ends + 1), -sign * percentages)
+        self.load += np.cumsum(diff, axis=1)[:, :self.days]
+
+    def remove(self, assignments):
+        """Take assignments back out of the index"""
+        self.add(assignments, sign=-1)
+
+    def to_arrays(self, assignments):
+        """Row index, clipped day offsets and percentages of assignments inside the window"""
+        rows, starts, ends, percentages = [], [], [], []
+        for assignment in assignments:
+            row = self.index.get(assignment.get("employee"))
+            if row is None:
+                continue
+            start = max(date_diff(assignment.get("start_date"), self.start_date), 0)
+            end = min(date_diff(assignment.get("end_date"), self.start_date), self.days - 1)
+            if end < start:
+                continue
+            rows.append(row)
+            starts.append(start)
+            ends.append(end)
+            percentages.append(float(assignment.get("allocation_percentage") or 0))
+
+        return np.array(rows, dtype=int), np.array(starts, dtype=int), np.array(ends, dtype=int), np.array(percentages)
+
+    def day_offset(self, date):
+        """Column of a date in the matrix, clipped to the window"""
+        return min(max(date_diff(date, self.start_date), 0), self.days - 1)
+
+    def peak_load(self, start_date=None, end_date=None):
+        """Highest daily load of every employee between two dates"""
+        start = self.day_offset(start_date or self.start_date)
+        end = self.day_offset(end_date or self.end_date)
+        if not self.days or end < start:
+            return np.zeros(len(self.employees))
+        return self.load[:, start:end + 1].max(axis=1)
+
+    def bucket_peak_load(self, bucket_days):
+        """Highest daily load per employee in consecutive buckets of bucket_days"""
+        buckets = -(-self.days // bucket_days)
+        padded = np.zeros((len(self.employees), buckets * bucket_days))
+        padded[:, :self.days] = self.load
+        return padded.reshape(len(self.employees), buckets, bucket_days).max(axis=2)
+
+def run_length_encode(values):
+    """Encode a sequence as a flat [value, count, value, count, ...] list"""
+    encoded = []
+    for value in values:
+        if encoded and encoded[-2] == value:
+            encoded[-1] += 1
+        else:
+            encoded.extend([value, 1])
+    return encoded
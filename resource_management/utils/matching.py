@@ -0,0 +1,75 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+import numpy as np
+
+def min_cost_assignment(cost):
+    """
+    Minimum cost assignment of rows to distinct columns (Hungarian algorithm)
+    cost is a rows x columns matrix where np.inf marks forbidden pairs.
+    Returns the matched column of every row, -1 when a row cannot be matched.
+    Runs in O(rows^2 * columns) with every inner step vectorized over the columns.
+    """
+    cost = np.asarray(cost, dtype=float)
+    rows, columns = cost.shape
+    if not rows or not columns:
+        return np.full(rows, -1, dtype=int)
+
+    # Forbidden pairs get a cost above any feasible total, and dummy columns keep
+    # the matrix at least as wide as it is tall
+    finite = np.isfinite(cost)
+    forbidden = (np.abs(cost[finite]).sum() + 1) * 2 if finite.any() else 1.0
+    width = max(columns, rows)
+    matrix = np.full((rows, width), forbidden)
+    matrix[:, :columns] = np.where(finite, cost, forbidden)
+
+    # Potentials and matching use 1-based rows and columns, 0 is the virtual start
+    u = np.zeros(rows + 1)
+    v = np.zeros(width + 1)
+    match = np.zeros(width + 1, dtype=int)
+    way = np.zeros(width + 1, dtype=int)
+
+    for row in range(1, rows + 1):
+        match[0] = row
+        column = 0
+        min_slack = np.full(width + 1, np.inf)
+        used = np.zeros(width + 1, dtype=bool)
+
+        while True:
+            used[column] = True
+            current_row = match[column]
+
+            # Relax the slack of every column not yet in the alternating tree
+            free = ~used
+            free[0] = False
+            slack = matrix[current_row - 1] - u[current_row] - v[1:]
+            improved = free[1:] & (slack < min_slack[1:])
+            min_slack[1:][improved] = slack[improved]
+            way[1:][improved] = column
+
+            candidates = np.where(free, min_slack, np.inf)
+            next_column = int(np.argmin(candidates))
+            delta = candidates[next_column]
+
+            u[match[used]] += delta
+            v[used] -= delta
+            min_slack[free] -= delta
+
+            column = next_column
+            if match[column] == 0:
+                break
+
+        # Flip the augmenting path
+        while column:
+            previous = way[column]
+            match[column] = match[previous]
+            column = previous
+
+    assignment = np.full(rows, -1, dtype=int)
+    for column in range(1, columns + 1):
+        if match[column]:
+            row = match[column] - 1
+            if finite[row, column - 1]:
+                assignment[row] = column - 1
+
+    return assignment
@@ -0,0 +1,170 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+import functools
+import hmac
+import time
+
+import frappe
+from werkzeug.wrappers import Response
+
+METRICS_PREFIX = "resource_management:metrics"
+METRICS_NAMES_KEY = "resource_management:metrics_names"
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+def instrument(kind):
+    """
+    Record latency, query count and row count of every call
+    kind labels the entry point: whitelist, doc_event or scheduler. Recording
+    never raises, a metrics failure cannot break the instrumented call.
+    """
+    def decorator(fn):
+        name = "{0}.{1}".format(fn.__module__.replace("resource_management.", "", 1), fn.__name__)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            counter = SQLCounter()
+            started = time.perf_counter()
+            failed = False
+            try:
+                with counter:
+                    return fn(*args, **kwargs)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                record(kind, name, time.perf_counter() - started, counter.queries, counter.rows, failed)
+
+        return wrapper
+
+    return decorator
+
+class SQLCounter:
+    """Count statements and returned rows going through frappe.db.sql, nests with outer counters"""
+
+    def __init__(self):
+        self.queries = 0
+        self.rows = 0
+        self._sql = None
+
+    def __enter__(self):
+        db = getattr(frappe.local, "db", None)
+        if not db:
+            return self
+
+        self._sql = db.sql
+
+        def sql(*args, **kwargs):
+            result = self._sql(*args, **kwargs)
+            self.queries += 1
+            if isinstance(result, (list, tuple)):
+                self.rows += len(result)
+            return result
+
+        db.sql = sql
+        return self
+
+    def __exit__(self, *exc):
+        if self._sql:
+            frappe.local.db.sql = self._sql
+
+def record(kind, name, duration, queries, rows, failed=False):
+    """Add one observation to the Redis aggregates, in a single round trip"""
+    try:
+        cache = frappe.cache()
+        key = cache.make_key("{0}:{1}:{2}".format(METRICS_PREFIX, kind, name))
+        bucket = next((str(bound) for bound in LATENCY_BUCKETS if duration <= bound), "+Inf")
+
+        pipeline = cache.pipeline()
+        pipeline.sadd(cache.make_key(METRICS_NAMES_KEY), "{0}:{1}".format(kind, name))
+        pipeline.hincrby(key, "count", 1)
+        pipeline.hincrbyfloat(key, "sum", duration)
+        pipeline.hincrby(key, "bucket:" + bucket, 1)
+        pipeline.hincrby(key, "queries", queries)
+        pipeline.hincrby(key, "rows", rows)
+        if failed:
+            pipeline.hincrby(key, "errors", 1)
+        pipeline.execute()
+    except Exception:
+        pass
+
+def get_metrics_text():
+    """All aggregates in the Prometheus text exposition format"""
+    cache = frappe.cache()
+    names = get_metric_names()
+
+    pipeline = cache.pipeline()
+    for entry in names:
+        pipeline.hgetall(cache.make_key("{0}:{1}".format(METRICS_PREFIX, entry)))
+    aggregates = pipeline.execute() if names else []
+
+    latency, queries, rows, errors = [], [], [], []
+    for entry, values in zip(names, aggregates):
+        values = {
+            (field.decode() if isinstance(field, bytes) else field): float(value)
+            for field, value in values.items()
+        }
+        kind, name = entry.split(":", 1)
+        labels = 'kind="{0}",name="{1}"'.format(kind, name)
+
+        cumulative = 0
+        for bound in LATENCY_BUCKETS:
+            cumulative += values.get("bucket:" + str(bound), 0)
+            latency.append('resource_management_duration_seconds_bucket{{{0},le="{1}"}} {2:g}'.format(
+                labels, bound, cumulative))
+        latency.append('resource_management_duration_seconds_bucket{{{0},le="+Inf"}} {1:g}'.format(
+            labels, values.get("count", 0)))
+        latency.append("resource_management_duration_seconds_sum{{{0}}} {1}".format(labels, values.get("sum", 0)))
+        latency.append("resource_management_duration_seconds_count{{{0}}} {1:g}".format(labels, values.get("count", 0)))
+
+        queries.append("resource_management_queries_total{{{0}}} {1:g}".format(labels, values.get("queries", 0)))
+        rows.append("resource_management_rows_total{{{0}}} {1:g}".format(labels, values.get("rows", 0)))
+        errors.append("resource_management_errors_total{{{0}}} {1:g}".format(labels, values.get("errors", 0)))
+
+    lines = [
+        "# HELP resource_management_duration_seconds Latency of instrumented calls",
+        "# TYPE resource_management_duration_seconds histogram",
+        *latency,
+        "# HELP resource_management_queries_total SQL statements issued by instrumented calls",
+        "# TYPE resource_management_queries_total counter",
+        *queries,
+        "# HELP resource_management_rows_total Rows returned to instrumented calls",
+        "# TYPE resource_management_rows_total counter",
+        *rows,
+        "# HELP resource_management_errors_total Instrumented calls that raised",
+        "# TYPE resource_management_errors_total counter",
+        *errors,
+    ]
+    return "\n".join(lines) + "\n"
+
+@frappe.whitelist(allow_guest=True)
+def metrics(token=None):
+    """
+    Prometheus scrape endpoint
+    Guests need the token set as resource_management_metrics_token in site config,
+    logged in users need the System Manager role
+    """
+    expected = frappe.conf.get("resource_management_metrics_token")
+    if not (expected and token and hmac.compare_digest(token, expected)):
+        frappe.only_for("System Manager")
+
+    return Response(get_metrics_text(), mimetype="text/plain; version=0.0.4")
+
+def get_metric_names():
+    """Every kind:name pair recorded so far"""
+    cache = frappe.cache()
+    pipeline = cache.pipeline()
+    pipeline.smembers(cache.make_key(METRICS_NAMES_KEY))
+    return sorted(value.decode() if isinstance(value, bytes) else value for value in pipeline.execute()[0])
+
+def reset_metrics():
+    """Drop every aggregate, for use after a deploy or from the console"""
+    cache = frappe.cache()
+    keys = [cache.make_key("{0}:{1}".format(METRICS_PREFIX, entry)) for entry in get_metric_names()]
+    keys.append(cache.make_key(METRICS_NAMES_KEY))
+
+    pipeline = cache.pipeline()
+    pipeline.delete(*keys)
+    pipeline.execute()
@@ -0,0 +1,112 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.utils import flt
+
+from resource_management.resource_management.doctype.resource_allocation_snapshot.resource_allocation_snapshot import (
+    mark_snapshots_stale,
+)
+from resource_management.utils.cost_engine import estimate_window_costs
+from resource_management.utils.metrics import instrument
+from resource_management.utils.report_cache import bump_cache_version
+
+# Assignments repriced and written per transaction
+RECOST_CHUNK_SIZE = 500
+
+@instrument("doc_event")
+def enqueue_recost_on_rate_change(doc, method=None):
+    """Employee on_update hook, reprices active assignments after a rate change"""
+    if not doc.is_new() and doc.has_value_changed("hourly_cost_rate"):
+        enqueue_recost(doc.name)
+
+def enqueue_recost(employee):
+    """Queue one recost job per employee, runs after the current transaction commits"""
+    frappe.enqueue(
+        "resource_management.utils.recosting.recost_employee_assignments",
+        queue="long",
+        job_id=f"recost_assignments::{employee}",
+        deduplicate=True,
+        enqueue_after_commit=True,
+        employee=employee
+    )
+
+@instrument("job")
+def recost_employee_assignments(employee):
+    """Reprice an employee's active assignments in chunks and refresh their projects' totals"""
+    emp = frappe.db.get_value("Employee", employee,
+        ["name", "hourly_cost_rate", "holiday_list", "company"], as_dict=1)
+    if not emp:
+        return
+
+    last_name = ""
+    updated = 0
+
+    while True:
+        # Keyset pagination keeps every chunk query cheap
+        assignments = frappe.db.sql("""
+            SELECT name, project, start_date, end_date, allocation_percentage, estimated_total_cost
+            FROM `tabProject Assignment`
+            WHERE employee = %s AND status = 'Active' AND docstatus = 1 AND name > %s
+            ORDER BY name
+            LIMIT %s
+        """, (employee, last_name, RECOST_CHUNK_SIZE), as_dict=1)
+
+        if not assignments:
+            break
+
+        updated += recost_chunk(emp, assignments)
+        frappe.db.commit()
+        last_name = assignments[-1].name
+
+    if updated:
+        bump_cache_version()
+
+def recost_chunk(emp, assignments):
+    """Write new costs for one chunk with bulk updates, returns the number changed"""
+    costs = estimate_window_costs([
+        {
+            "employee": emp.name,
+            "start_date": assignment.start_date,
+            "end_date": assignment.end_date,
+            "allocation_percentage": assignment.allocation_percentage,
+            "hourly_cost_rate": emp.hourly_cost_rate,
+            "holiday_list": emp.holiday_list,
+            "company": emp.company
+        }
+        for assignment in assignments
+    ])
+
+    updates = {}
+    changed = []
+    for assignment, cost in zip(assignments, costs):
+        cost = flt(cost, 2)
+        if abs(cost - flt(assignment.estimated_total_cost)) < 0.005:
+            continue
+        updates[assignment.name] = {"estimated_total_cost": cost}
+        changed.append(assignment)
+
+    if updates:
+        frappe.db.bulk_update("Project Assignment", updates)
+        update_project_resource_costs({assignment.project for assignment in changed})
+        # Closed months prorate the assignment cost, the bulk update runs no hooks
+        mark_snapshots_stale(min(a.start_date for a in changed), max(a.end_date for a in changed))
+
+    return len(updates)
+
+def update_project_resource_costs(projects):
+    """Set each project's resource cost to the total of its active assignments, in one statement"""
+    if not projects:
+        return
+
+    frappe.db.sql("""
+        UPDATE `tabProject` p
+        LEFT JOIN (
+            SELECT project, SUM(IFNULL(estimated_total_cost, 0)) as total_cost
+            FROM `tabProject Assignment`
+            WHERE project IN %(projects)s AND status = 'Active' AND docstatus = 1
+            GROUP BY project
+        ) pa ON pa.project = p.name
+        SET p.estimated_resource_cost = IFNULL(pa.total_cost, 0)
+        WHERE p.name IN %(projects)s
+    """, {"projects": tuple(projects)})
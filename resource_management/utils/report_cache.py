@@ -0,0 +1,131 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+import hashlib
+import json
+
+import frappe
+from frappe import _
+from frappe.core.doctype.user_permission.user_permission import get_user_permissions
+from frappe.utils import get_datetime, now_datetime, pretty_date, today
+
+from resource_management.utils.metrics import instrument
+
+REPORT_CACHE_PREFIX = "resource_management:report_cache"
+REPORT_CACHE_VERSION_KEY = "resource_management:report_cache_version"
+
+# Cached results are dropped after an hour even if nothing changed
+REPORT_CACHE_TTL = 60 * 60
+
+# Link doctypes whose User Permissions restrict what the report shows
+PERMISSION_SCOPE_DOCTYPES = ("Employee", "Project", "Department")
+
+def get_cached_report(report_name, filters, compute):
+    """
+    Return (result, cache_info) for a report, calling compute() on a miss
+    cache_info has from_cache, computed_on and age_seconds
+    """
+    key = get_cache_key(report_name, filters)
+    cached = frappe.cache().get_value(key)
+
+    if cached:
+        computed_on = get_datetime(cached["computed_on"])
+        return cached["result"], {
+            "from_cache": True,
+            "computed_on": computed_on,
+            "age_seconds": int((now_datetime() - computed_on).total_seconds())
+        }
+
+    result = compute()
+    computed_on = now_datetime()
+    frappe.cache().set_value(key, {
+        "computed_on": str(computed_on),
+        "result": result
+    }, expires_in_sec=REPORT_CACHE_TTL)
+
+    return result, {
+        "from_cache": False,
+        "computed_on": computed_on,
+        "age_seconds": 0
+    }
+
+def get_cache_message(cache_info):
+    """Describe where a report result came from"""
+    if cache_info["from_cache"]:
+        return _("Served from cache, computed {0}").format(
+            pretty_date(cache_info["computed_on"]))
+
+    return _("Computed live")
+
+def get_cache_key(report_name, filters):
+    """Build the cache key from the normalized filters and the permission scope"""
+    payload = json.dumps({
+        "report": report_name,
+        # Day-relative columns such as remaining days change at midnight
+        "date": today(),
+        "filters": normalize_filters(filters),
+        "scope": get_permission_scope()
+    }, sort_keys=True, default=str)
+
+    digest = hashlib.sha1(payload.encode()).hexdigest()
+    return f"{REPORT_CACHE_PREFIX}:{get_cache_version()}:{digest}"
+
+def normalize_filters(filters):
+    """Drop empty filters and stringify values so equal filters give equal keys"""
+    normalized = {}
+    for key, value in (filters or {}).items():
+        if value in (None, "", [], {}):
+            continue
+        if isinstance(value, (list, tuple)):
+            value = [str(v) for v in value]
+        else:
+            value = str(value).strip()
+        normalized[key] = value
+
+    return normalized
+
+def get_permission_scope(user=None):
+    """Roles and link restrictions that can change what a user sees"""
+    user = user or frappe.session.user
+    user_permissions = get_user_permissions(user)
+
+    return {
+        "roles": sorted(frappe.get_roles(user)),
+        "user_permissions": {
+            doctype: sorted(perm.get("doc") for perm in user_permissions[doctype])
+            for doctype in PERMISSION_SCOPE_DOCTYPES
+            if user_permissions.get(doctype)
+        }
+    }
+
+def get_cache_version():
+    """Current version stamp, every cache key is built on top of it"""
+    version = frappe.cache().get_value(REPORT_CACHE_VERSION_KEY)
+    if not version:
+        version = bump_cache_version()
+    return version
+
+def bump_cache_version():
+    """Invalidate every cached report result by moving to a new version stamp"""
+    version = frappe.generate_hash(length=10)
+    frappe.cache().set_value(REPORT_CACHE_VERSION_KEY, version)
+    return version
+
+# Document event handlers
+
+@instrument("doc_event")
+def invalidate_on_assignment_change(doc, method=None):
+    """Any Project Assignment change can alter report rows"""
+    bump_cache_version()
+
+@instrument("doc_event")
+def invalidate_on_employee_change(doc, method=None):
+    """Only the employee fields shown in reports invalidate the cache"""
+    if doc.has_value_changed("department") or doc.has_value_changed("employee_name"):
+        bump_cache_version()
+
+@instrument("doc_event")
+def invalidate_on_project_change(doc, method=None):
+    """Only a project rename invalidates the cache"""
+    if doc.has_value_changed("project_name"):
+        bump_cache_version()
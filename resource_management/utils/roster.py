@@ -0,0 +1,89 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.utils import flt
+from frappe.utils.caching import request_cache
+
+from resource_management.utils.metrics import instrument
+
+ROSTER_CACHE_KEY = "resource_management:employee_roster"
+
+# Rows are stored as lists in this column order, not as dicts
+ROSTER_FIELDS = ["name", "employee_name", "department", "designation", "hourly_cost_rate",
+    "holiday_list", "company"]
+
+# Hooks keep the roster fresh, the expiry only bounds a missed invalidation
+ROSTER_CACHE_TTL = 24 * 60 * 60
+
+def get_active_employees(employees=None, department=None):
+    """Active employees ordered by ID, optionally only the given IDs or one department"""
+    roster = get_roster().employees
+    if employees is not None:
+        employees = set(employees)
+        roster = [emp for emp in roster if emp.name in employees]
+    if department:
+        roster = [emp for emp in roster if emp.department == department]
+    return roster
+
+def get_user_full_name(user):
+    """Display name of a user, the user ID when it has none"""
+    return get_roster().users.get(user) or user
+
+@request_cache
+def get_roster():
+    """Roster and user display names, one cache read per request"""
+    roster = frappe.cache().get_value(ROSTER_CACHE_KEY)
+    if roster is None:
+        roster = build_roster()
+        frappe.cache().set_value(ROSTER_CACHE_KEY, roster, expires_in_sec=ROSTER_CACHE_TTL)
+
+    return frappe._dict(
+        employees=[frappe._dict(zip(roster["fields"], row)) for row in roster["rows"]],
+        users=roster["users"]
+    )
+
+def build_roster():
+    """Compact roster: the field list once, then one value list per employee"""
+    rows = frappe.get_all("Employee",
+        filters={"status": "Active"},
+        fields=ROSTER_FIELDS,
+        order_by="name asc",
+        as_list=True
+    )
+    users = frappe.get_all("User",
+        filters={"enabled": 1},
+        fields=["name", "full_name"],
+        as_list=True
+    )
+
+    rate_column = ROSTER_FIELDS.index("hourly_cost_rate")
+    return {
+        "fields": ROSTER_FIELDS,
+        "rows": [
+            [flt(value) if i == rate_column else value for i, value in enumerate(row)]
+            for row in rows
+        ],
+        "users": {name: full_name for name, full_name in users if full_name}
+    }
+
+@instrument("doc_event")
+def clear_roster_cache(doc=None, method=None, *args):
+    """Drop the roster when an employee or user field it holds changes"""
+    if doc and method == "on_update":
+        fields = ROSTER_FIELDS + ["status"] if doc.doctype == "Employee" else ["full_name", "enabled"]
+        if not any(doc.has_value_changed(field) for field in fields):
+            return
+
+    # Dropped once the change is committed, a rebuild before that would cache the old rows
+    if not getattr(frappe.local, "roster_clear_pending", False):
+        frappe.local.roster_clear_pending = True
+        frappe.db.after_commit.add(delete_roster_cache)
+        frappe.db.after_rollback.add(discard_roster_cache_clear)
+
+def delete_roster_cache():
+    frappe.local.roster_clear_pending = False
+    frappe.cache().delete_value(ROSTER_CACHE_KEY)
+
+def discard_roster_cache_clear():
+    frappe.local.roster_clear_pending = False
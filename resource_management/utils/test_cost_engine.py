@@ -0,0 +1,99 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, getdate
+
+from resource_management.utils.cost_engine import (
+    HOURS_PER_DAY,
+    clear_holiday_cache,
+    count_working_days,
+    estimate_cost_matrix,
+    estimate_costs,
+    get_rate_days,
+)
+
+# Not an Employee, so there is no rate history and the given rate is used
+EMPLOYEE = "_Test Cost Engine Employee"
+
+HOLIDAY_LIST = "_Test Cost Engine Holidays 2026"
+
+
+def make_holiday_list():
+    """Holiday List for 2026 only, with every weekend and New Year's Day"""
+    if frappe.db.exists("Holiday List", HOLIDAY_LIST):
+        return
+
+    holidays, date = [], getdate("2026-01-01")
+    while date <= getdate("2026-12-31"):
+        if date.weekday() >= 5 or date == getdate("2026-01-01"):
+            holidays.append({"holiday_date": date, "description": "Holiday"})
+        date = add_days(date, 1)
+
+    frappe.get_doc({
+        "doctype": "Holiday List",
+        "holiday_list_name": HOLIDAY_LIST,
+        "from_date": "2026-01-01",
+        "to_date": "2026-12-31",
+        "holidays": holidays
+    }).insert()
+
+
+class TestCostEngine(FrappeTestCase):
+    def test_count_working_days_skips_weekends(self):
+        # Monday 5 January to Friday 16 January 2026, both ends included
+        days = count_working_days(["2026-01-05", "2026-01-10"], ["2026-01-16", "2026-01-11"], ["", ""])
+        self.assertEqual(list(days), [10, 0])
+
+    def test_holiday_list_applies_inside_its_range(self):
+        make_holiday_list()
+        clear_holiday_cache()
+        # January 2026 has 21 working days once New Year's Day is off
+        self.assertEqual(list(count_working_days(["2026-01-01"], ["2026-01-31"], [HOLIDAY_LIST])), [21])
+
+    def test_days_past_the_holiday_list_count_monday_to_friday(self):
+        make_holiday_list()
+        clear_holiday_cache()
+        days = count_working_days(
+            ["2027-01-01", "2026-12-28"], ["2027-01-31", "2027-01-08"], [HOLIDAY_LIST, HOLIDAY_LIST]
+        )
+        # Only weekdays outside the list, and 4 + 6 days across its end
+        self.assertEqual(list(days), [21, 10])
+
+    def test_end_before_start_counts_nothing(self):
+        self.assertEqual(list(count_working_days(["2026-01-09"], ["2026-01-05"], [""])), [0])
+
+    def test_estimate_costs(self):
+        employees = [
+            {"name": EMPLOYEE, "hourly_cost_rate": 50},
+            {"name": EMPLOYEE + " 2", "hourly_cost_rate": 20},
+        ]
+        costs = estimate_costs(employees, "2026-01-05", "2026-01-16", 50)
+        self.assertEqual(list(costs), [10 * HOURS_PER_DAY * 50 * 0.5, 10 * HOURS_PER_DAY * 20 * 0.5])
+
+    def test_cost_matrix_matches_single_windows(self):
+        employees = [
+            {"name": EMPLOYEE, "hourly_cost_rate": 50},
+            {"name": EMPLOYEE + " 2", "hourly_cost_rate": 20},
+        ]
+        windows = [
+            {"start_date": "2026-01-05", "end_date": "2026-01-16", "allocation_percentage": 50},
+            {"start_date": "2026-02-02", "end_date": "2026-02-06", "allocation_percentage": 100},
+        ]
+        matrix = estimate_cost_matrix(employees, windows)
+
+        self.assertEqual(matrix.shape, (2, 2))
+        for row, window in enumerate(windows):
+            expected = estimate_costs(
+                employees, window["start_date"], window["end_date"], window["allocation_percentage"]
+            )
+            self.assertEqual(list(matrix[row]), list(expected))
+
+    def test_rate_change_splits_the_window(self):
+        # 40 per hour for the first week, 60 from Monday 12 January
+        rate_periods = {EMPLOYEE: ([getdate("2025-01-01"), getdate("2026-01-12")], [40, 60])}
+        rate_days = get_rate_days(
+            [{"employee": EMPLOYEE, "start_date": "2026-01-05", "end_date": "2026-01-16"}], rate_periods
+        )
+        self.assertEqual(list(rate_days), [5 * 40 + 5 * 60])
@@ -0,0 +1,39 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import getdate
+
+from resource_management.utils.cost_rates import get_rate_on, get_rate_segments
+
+EMPLOYEE = "_Test Cost Rate Employee"
+
+# 40 per hour from 2025, 60 from 12 January 2026
+RATE_PERIODS = {EMPLOYEE: ([getdate("2025-01-01"), getdate("2026-01-12")], [40, 60])}
+
+
+class TestCostRates(FrappeTestCase):
+    def test_rate_on(self):
+        self.assertEqual(get_rate_on(EMPLOYEE, "2026-01-11", rate_periods=RATE_PERIODS), 40)
+        self.assertEqual(get_rate_on(EMPLOYEE, "2026-01-12", rate_periods=RATE_PERIODS), 60)
+
+    def test_dates_before_history_use_the_earliest_rate(self):
+        self.assertEqual(get_rate_on(EMPLOYEE, "2024-06-01", rate_periods=RATE_PERIODS), 40)
+
+    def test_no_history_uses_the_fallback(self):
+        self.assertEqual(get_rate_on("_Test Other Employee", "2026-01-12", 25, rate_periods=RATE_PERIODS), 25)
+
+    def test_segments_split_at_rate_changes(self):
+        self.assertEqual(
+            get_rate_segments(EMPLOYEE, "2026-01-05", "2026-01-16", rate_periods=RATE_PERIODS),
+            [
+                (getdate("2026-01-05"), getdate("2026-01-11"), 40),
+                (getdate("2026-01-12"), getdate("2026-01-16"), 60),
+            ],
+        )
+
+    def test_window_inside_one_period_is_one_segment(self):
+        self.assertEqual(
+            get_rate_segments(EMPLOYEE, "2026-02-01", "2026-02-28", rate_periods=RATE_PERIODS),
+            [(getdate("2026-02-01"), getdate("2026-02-28"), 60)],
+        )
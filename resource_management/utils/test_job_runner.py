@@ -0,0 +1,89 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_to_date, now_datetime
+
+from resource_management.utils.job_runner import get_interrupted_runs, run_chunked_job, run_once, start_run
+
+JOB_NAME = "_test_chunked_job"
+
+ROWS = [frappe._dict(name=f"ROW-{i:03d}") for i in range(1, 11)]
+
+
+def fetch_rows(after, limit):
+    return [row for row in ROWS if row.name > after][:limit]
+
+
+class TestJobRunner(FrappeTestCase):
+    def setUp(self):
+        # Every test gets its own run, the runner commits its ledger
+        self.run_key = frappe.generate_hash(length=10)
+        self.processed = []
+
+    def tearDown(self):
+        frappe.db.delete("Resource Job Run", {"run_key": self.run_key})
+        frappe.db.commit()
+
+    def process(self, rows):
+        self.processed.extend(row.name for row in rows)
+
+    def test_chunks_are_checkpointed(self):
+        run = run_chunked_job(JOB_NAME, self.run_key, fetch_rows, self.process, chunk_size=3)
+        run.reload()
+
+        self.assertEqual(self.processed, [row.name for row in ROWS])
+        self.assertEqual(run.status, "Completed")
+        self.assertEqual(run.checkpoint, "ROW-010")
+        self.assertEqual(run.chunks, 4)
+        self.assertEqual(run.rows_processed, 10)
+
+    def test_completed_run_is_not_repeated(self):
+        run_chunked_job(JOB_NAME, self.run_key, fetch_rows, self.process, chunk_size=3)
+        self.processed = []
+
+        self.assertIsNone(run_chunked_job(JOB_NAME, self.run_key, fetch_rows, self.process, chunk_size=3))
+        self.assertEqual(self.processed, [])
+
+    def test_failed_run_resumes_after_the_last_chunk(self):
+        def fail_on_third_chunk(rows):
+            if rows[0].name == "ROW-007":
+                raise frappe.ValidationError("chunk failed")
+            self.process(rows)
+
+        with self.assertRaises(frappe.ValidationError):
+            run_chunked_job(JOB_NAME, self.run_key, fetch_rows, fail_on_third_chunk, chunk_size=3)
+
+        run = frappe.get_doc("Resource Job Run", f"{JOB_NAME}::{self.run_key}")
+        self.assertEqual(run.status, "Failed")
+        self.assertEqual(run.checkpoint, "ROW-006")
+        self.assertIn(run.name, [r.name for r in get_interrupted_runs()])
+
+        self.processed = []
+        run_chunked_job(JOB_NAME, self.run_key, fetch_rows, self.process, chunk_size=3)
+        run.reload()
+
+        self.assertEqual(self.processed, ["ROW-007", "ROW-008", "ROW-009", "ROW-010"])
+        self.assertEqual(run.status, "Completed")
+        self.assertEqual(run.attempts, 2)
+        self.assertEqual(run.rows_processed, 10)
+
+    def test_running_run_is_claimed_once_stale(self):
+        run = start_run(JOB_NAME, self.run_key)
+        self.assertIsNone(start_run(JOB_NAME, self.run_key))
+
+        # A worker that stopped updating its run long ago is presumed dead
+        frappe.db.set_value("Resource Job Run", run.name, "modified",
+            add_to_date(now_datetime(), hours=-2), update_modified=False)
+        frappe.db.commit()
+
+        self.assertEqual(start_run(JOB_NAME, self.run_key).name, run.name)
+
+    def test_run_once_records_rows(self):
+        run = run_once(JOB_NAME, self.run_key, lambda: 42)
+        run.reload()
+
+        self.assertEqual(run.status, "Completed")
+        self.assertEqual(run.rows_processed, 42)
+        self.assertIsNone(run_once(JOB_NAME, self.run_key, lambda: 42))
@@ -0,0 +1,64 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from resource_management.utils.load_index import LoadIndex, run_length_encode
+
+
+def assignment(employee, start_date, end_date, allocation_percentage):
+    return frappe._dict(
+        employee=employee,
+        start_date=start_date,
+        end_date=end_date,
+        allocation_percentage=allocation_percentage,
+    )
+
+
+class TestLoadIndex(FrappeTestCase):
+    def setUp(self):
+        # January 2026, 31 days
+        self.index = LoadIndex(["EMP-1", "EMP-2"], "2026-01-01", "2026-01-31", [
+            assignment("EMP-1", "2026-01-01", "2026-01-10", 50),
+            assignment("EMP-1", "2026-01-06", "2026-01-20", 30),
+            assignment("EMP-2", "2026-01-15", "2026-01-31", 100),
+        ])
+
+    def test_daily_load(self):
+        load = self.index.load
+        self.assertEqual(load.shape, (2, 31))
+        self.assertEqual(load[0, 0], 50)
+        self.assertEqual(load[0, 5], 80)
+        self.assertEqual(load[0, 10], 30)
+        self.assertEqual(load[0, 20], 0)
+        self.assertEqual(load[1, 13], 0)
+        self.assertEqual(load[1, 14], 100)
+
+    def test_peak_load(self):
+        self.assertEqual(list(self.index.peak_load()), [80, 100])
+        self.assertEqual(list(self.index.peak_load("2026-01-11", "2026-01-14")), [30, 0])
+
+    def test_assignments_are_clipped_to_the_window(self):
+        self.index.add([
+            assignment("EMP-2", "2025-12-01", "2026-01-02", 20),
+            assignment("EMP-2", "2026-02-01", "2026-02-10", 20),
+            assignment("EMP-3", "2026-01-01", "2026-01-31", 20),
+        ])
+        self.assertEqual(list(self.index.load[1, :3]), [20, 20, 0])
+        self.assertEqual(self.index.load[1, 30], 100)
+
+    def test_remove_takes_an_assignment_back_out(self):
+        self.index.remove([assignment("EMP-1", "2026-01-06", "2026-01-20", 30)])
+        self.assertEqual(list(self.index.peak_load()), [50, 100])
+
+    def test_bucket_peak_load(self):
+        # Five buckets of seven days, the last one padded
+        buckets = self.index.bucket_peak_load(7)
+        self.assertEqual(buckets.shape, (2, 5))
+        self.assertEqual(list(buckets[0]), [80, 80, 30, 0, 0])
+        self.assertEqual(list(buckets[1]), [0, 0, 100, 100, 100])
+
+    def test_run_length_encode(self):
+        self.assertEqual(run_length_encode([0, 0, 50, 50, 50, 0]), [0, 2, 50, 3, 0, 1])
+        self.assertEqual(run_length_encode([]), [])
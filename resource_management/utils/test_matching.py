@@ -0,0 +1,59 @@
+# Copyright (c) 2023, Yazan Hamdan and contributors
+# For license information, please see license.txt
+
+from itertools import permutations
+
+import numpy as np
+from frappe.tests.utils import FrappeTestCase
+
+from resource_management.utils.matching import min_cost_assignment
+
+
+def total_cost(cost, assignment):
+    return sum(cost[row][column] for row, column in enumerate(assignment) if column >= 0)
+
+
+class TestMinCostAssignment(FrappeTestCase):
+    def test_square_matrix(self):
+        cost = [
+            [4, 1, 3],
+            [2, 0, 5],
+            [3, 2, 2],
+        ]
+        assignment = min_cost_assignment(cost)
+        self.assertEqual(sorted(assignment), [0, 1, 2])
+        self.assertEqual(total_cost(cost, assignment), 5)
+
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(7)
+        for rows, columns in ((3, 3), (3, 5), (4, 6), (5, 5)):
+            cost = rng.integers(0, 100, size=(rows, columns)).astype(float)
+            best = min(
+                sum(cost[row, column] for row, column in enumerate(chosen))
+                for chosen in permutations(range(columns), rows)
+            )
+            assignment = min_cost_assignment(cost)
+            self.assertEqual(len(set(assignment)), rows)
+            self.assertEqual(total_cost(cost, assignment), best)
+
+    def test_forbidden_pairs_are_never_matched(self):
+        inf = np.inf
+        cost = [
+            [1, inf],
+            [2, inf],
+        ]
+        # Both rows can only take column 0, the cheaper total leaves row 1 out
+        self.assertEqual(list(min_cost_assignment(cost)), [0, -1])
+
+    def test_more_rows_than_columns(self):
+        cost = [
+            [5, 9],
+            [1, 8],
+            [7, 2],
+        ]
+        assignment = min_cost_assignment(cost)
+        self.assertEqual(list(assignment), [-1, 0, 1])
+
+    def test_empty_matrix(self):
+        self.assertEqual(len(min_cost_assignment(np.zeros((0, 3)))), 0)
+        self.assertEqual(list(min_cost_assignment(np.zeros((2, 0)))), [-1, -1])